@@ -0,0 +1,180 @@
+"""Batched metric aggregation over verified claims.
+
+Computes, for many explanations at once, the same five metrics, status and
+confidence histograms and overall status as the per-explanation functions
+in verifier.py. Claim features are gathered into flat arrays and reduced
+per explanation with NumPy; without NumPy (or for small batches) an
+equivalent single-pass pure-Python loop is used. Results match the
+per-explanation functions exactly, including int() truncation.
+"""
+
+import os
+from typing import Dict, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional: the pure-Python path gives identical results
+    np = None
+
+METRIC_NAMES = ("data_quality", "logical_consistency", "completeness",
+                "evidence_strength", "contextual_relevance")
+
+STATUSES = ("valid", "invalid", "questionable")
+CONFIDENCE_BANDS = ("high", "medium", "low")
+
+# Batches with fewer claims than this use the pure-Python path
+NUMPY_MIN_CLAIMS = int(os.environ.get('AGGREGATE_NUMPY_MIN_CLAIMS', 256))
+
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def aggregate_claims(claim_lists: Sequence[List[Dict]], explanations: Sequence[str]) -> List[Dict]:
+    """
+    Aggregate each explanation's verified claims into
+    {"metrics", "status_distribution", "confidence_distribution", "overall_status"}.
+    """
+    if np is not None and sum(len(claims) for claims in claim_lists) >= NUMPY_MIN_CLAIMS:
+        return _aggregate_numpy(claim_lists, explanations)
+    return [_aggregate_one(claims, explanation) for claims, explanation in zip(claim_lists, explanations)]
+
+
+def summarize_results(results: Sequence[Dict]) -> Dict:
+    """Batch-level totals over verification results: overall statuses, claim histograms, mean metrics"""
+    overall = dict.fromkeys(STATUSES, 0)
+    statuses = dict.fromkeys(STATUSES, 0)
+    bands = dict.fromkeys(CONFIDENCE_BANDS, 0)
+    totals = dict.fromkeys(METRIC_NAMES, 0)
+    for result in results:
+        overall[result["overall_status"]] += 1
+        for status, count in result["chart_data"]["status_distribution"].items():
+            statuses[status] += count
+        for band, count in result["chart_data"]["confidence_distribution"].items():
+            bands[band] += count
+        for name in METRIC_NAMES:
+            totals[name] += result["metrics"][name]
+    count = len(results)
+    return {
+        "explanations": count,
+        "overall_status": overall,
+        "status_distribution": statuses,
+        "confidence_distribution": bands,
+        "mean_metrics": {name: round(total / count, 1) if count else 0.0 for name, total in totals.items()}
+    }
+
+
+def _contextual_relevance(explanation: str) -> int:
+    word_count = len(explanation.split())
+    return min(100, int((word_count / 50) * 100))  # 50+ words = 100%
+
+
+class RunningAggregate:
+    """
+    ``aggregate_claims`` for one explanation, built up a claim at a time:
+    after every ``add``, ``result()`` equals aggregating the claims so far.
+    """
+
+    def __init__(self, explanation: str):
+        self.relevance = _contextual_relevance(explanation)
+        self.statuses = dict.fromkeys(STATUSES, 0)
+        self.bands = dict.fromkeys(CONFIDENCE_BANDS, 0)
+        self.total = self.data_supported = self.specificity = self.confidence_total = 0
+
+    def add(self, claim: Dict) -> None:
+        self.total += 1
+        self.statuses[claim["status"]] += 1
+        confidence = claim.get("confidence", 50)
+        self.confidence_total += confidence
+        if confidence >= 75:
+            self.bands["high"] += 1
+        elif confidence >= 45:
+            self.bands["medium"] += 1
+        else:
+            self.bands["low"] += 1
+        self.specificity += claim.get("specificity_score", 0)
+        if claim.get("data_support", False):
+            self.data_supported += 1
+
+    def result(self) -> Dict:
+        total = self.total
+        statuses = self.statuses
+        if total == 0:
+            metrics = dict.fromkeys(METRIC_NAMES, 50)
+            overall = "questionable"
+        else:
+            consistency = int(((statuses["valid"] - statuses["invalid"]) / total) * 100)
+            metrics = {
+                "data_quality": int((self.data_supported / total) * 100),
+                "logical_consistency": max(0, min(100, consistency + 50)),
+                "completeness": int(self.specificity / total),
+                "evidence_strength": int(self.confidence_total / total),
+                "contextual_relevance": self.relevance
+            }
+            if statuses["invalid"] > 0:
+                overall = "invalid"
+            elif statuses["valid"] / total >= 0.7:
+                overall = "valid"
+            else:
+                overall = "questionable"
+
+        return {
+            "metrics": metrics,
+            "status_distribution": dict(statuses),
+            "confidence_distribution": dict(self.bands),
+            "overall_status": overall
+        }
+
+
+def _aggregate_one(claims: List[Dict], explanation: str) -> Dict:
+    running = RunningAggregate(explanation)
+    for claim in claims:
+        running.add(claim)
+    return running.result()
+
+
+def _aggregate_numpy(claim_lists: Sequence[List[Dict]], explanations: Sequence[str]) -> List[Dict]:
+    count = len(claim_lists)
+    lengths = np.fromiter((len(claims) for claims in claim_lists), dtype=np.int64, count=count)
+    claim_total = int(lengths.sum())
+
+    # Gather claim features into flat columns
+    flat = [claim for claims in claim_lists for claim in claims]
+    status = np.fromiter((_STATUS_CODES[claim["status"]] for claim in flat), dtype=np.int64, count=claim_total)
+    confidence = np.fromiter((claim.get("confidence", 50) for claim in flat), dtype=np.int64, count=claim_total)
+    specificity = np.fromiter((claim.get("specificity_score", 0) for claim in flat), dtype=np.int64, count=claim_total)
+    supported = np.fromiter((bool(claim.get("data_support", False)) for claim in flat), dtype=np.int64, count=claim_total)
+    owner = np.repeat(np.arange(count), lengths)
+
+    def per_explanation(values):
+        return np.bincount(owner, weights=values, minlength=count)
+
+    band = np.where(confidence >= 75, 0, np.where(confidence >= 45, 1, 2))
+    status_counts = np.bincount(owner * 3 + status, minlength=count * 3).reshape(count, 3)
+    band_counts = np.bincount(owner * 3 + band, minlength=count * 3).reshape(count, 3)
+
+    # Empty explanations divide by 1 and are overwritten with the defaults below
+    total = np.maximum(lengths, 1).astype(np.float64)
+    valid, invalid = status_counts[:, 0], status_counts[:, 1]
+    words = np.fromiter((len(explanation.split()) for explanation in explanations), dtype=np.int64, count=count)
+    columns = np.stack([
+        np.trunc((per_explanation(supported) / total) * 100),
+        np.clip(np.trunc(((valid - invalid) / total) * 100) + 50, 0, 100),
+        np.trunc(per_explanation(specificity) / total),
+        np.trunc(per_explanation(confidence) / total),
+        np.minimum(100, np.trunc((words / 50) * 100))
+    ], axis=1).astype(np.int64)
+    empty = lengths == 0
+    columns[empty] = 50
+
+    overall = np.where(invalid > 0, 1, np.where(valid / total >= 0.7, 0, 2))
+    overall[empty] = 2
+
+    return [
+        {
+            "metrics": dict(zip(METRIC_NAMES, metric_row)),
+            "status_distribution": dict(zip(STATUSES, status_row)),
+            "confidence_distribution": dict(zip(CONFIDENCE_BANDS, band_row)),
+            "overall_status": STATUSES[code]
+        }
+        for metric_row, status_row, band_row, code in zip(
+            columns.tolist(), status_counts.tolist(), band_counts.tolist(), overall.tolist())
+    ]
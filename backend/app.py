@@ -1,29 +1,75 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
-from verifier import verify_explanation
-from demo_data import DEMO_EXAMPLES, get_random_demo, search_similar_demos
+from aggregate import summarize_results
+from instrumentation import collect_timings, observe_request, render_prometheus
+from rules import RULES
+from verifier import RESULT_CACHE, claim_cache_stats, verify_explanations
+from incremental import UnknownHandle
+from service import (MSGPACK_MIMETYPE, apply_profile, examples_response, live_events, pack_msgpack,
+                     pipeline_option, response_profile, scoring_options, search_similar_response, sse_event,
+                     verify_coalesced, verify_incremental, verify_with_context, wants_msgpack)
+from stream import verify_stream
+from demo_data import DEMO_EXAMPLES, get_random_demo, get_similarity_index
 import os
+import threading
+import time
 
-app = Flask(__name___name__, static_folder='../frontend', static_url_path='')
+# Upper bound on explanations accepted by a single /api/verify/batch call
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 50000))
+
+# Worker processes used per /api/verify/stream request
+STREAM_WORKERS = int(os.environ.get('STREAM_WORKERS', 1))
+
+app = Flask(__name__, static_folder='../frontend', static_url_path='')
 CORS(app)
 
+# Build the similarity index at start-up, not on the first /api/verify
+threading.Thread(target=get_similarity_index, name='similarity-index', daemon=True).start()
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_latency(response):
+    if request.endpoint and 'request_start' in g:
+        observe_request(request.endpoint, time.perf_counter() - g.request_start)
+    return response
+
+def respond(payload, status=200, packed=False):
+    """JSON response, or MessagePack when the client asked for it"""
+    if packed:
+        return Response(pack_msgpack(payload), status=status, mimetype=MSGPACK_MIMETYPE)
+    return jsonify(payload), status
+
 # Serve frontend
 @app.route('/')
 def index():
     return send_from_directory('../frontend', 'index.html')
 
 
-@app.route(/api')
+@app.route('/api')
 def home():
     return jsonify({
         "message": "ExplAInCheck API - Agriculture Track 🌽",
         "status": "running",
         "version": "2.0.0",
         "endpoints": {
-            "/api/verify": "POST - Verify AI explanations with detailed analysis",
-            "/api/examples": "GET - Get all demo examples",
+            "/api/verify": "POST - Verify AI explanations with detailed analysis (profile=minimal|standard|full, pipeline=fast|nlp, ?format=msgpack)",
+            "/api/verify/incremental": "POST - Re-verify only edited claims (handle + edits)",
+            "/api/verify/live": "POST - Server-Sent Events: per-claim results and metric deltas",
+            "/api/verify/batch": "POST - Verify many explanations in parallel",
+            "/api/verify/stream": "POST - Stream NDJSON/CSV in, NDJSON results out",
+            "/api/examples": "GET - Get demo examples (?offset=&limit=&fields=)",
             "/api/random-demo": "GET - Get random demo scenario",
-            "/api/search-similar": "POST - Find similar scenarios (fuzzy matching)"
+            "/api/search-similar": "POST - Find similar scenarios (fuzzy matching)",
+            "/api/scenarios": "GET - Corpus size/version; POST - Add or replace scenarios",
+            "/api/scenarios/<id>": "GET - One scenario; DELETE - Remove it",
+            "/api/scenarios/reload": "POST - Re-read SCENARIO_CORPUS and apply the changes",
+            "/api/cache/stats": "GET - Result and per-claim cache hit/miss counters",
+            "/api/rules": "GET - Loaded domain rule packs",
+            "/api/rules/reload": "POST - Reload rule packs from RULE_PACKS_DIR now",
+            "/metrics": "GET - Prometheus metrics (stage latencies, work counters, caches)"
         }
     })
 
@@ -37,54 +83,145 @@ def verify():
         
         if not explanation:
             return jsonify({"error": "No explanation provided"}), 400
+        try:
+            options = dict(scoring_options(data), **pipeline_option(data))
+            profile = response_profile(data if data.get('profile') else request.args)
+            packed = wants_msgpack(request.args, request.headers)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        # Check for similar demos first (fuzzy matching)
-        similar_matches = search_similar_demos(explanation, threshold=0.5)
-        
-        if similar_matches and len(similar_matches) > 0:
-            # Use the best matching demo
-            best_match = similar_matches[0]
-            demo = best_match["demo"]
-            
-            # Run verification with enhanced context
-            result = verify_explanation(explanation, domain)
-            
-            # Add similarity information and recommendations
-            result["similarity_match"] = {
-                "found": True,
-                "similarity_score": round(best_match["similarity"] * 100, 1),
-                "matched_scenario": demo["title"],
-                "category": demo.get("category", "general"),
-                "recommendation": f"Your input is {round(best_match['similarity'] * 100, 1)}% similar to a known scenario. Consider the following approach..."
-            }
-            
-            # Add scenario-specific metrics
-            result["enhanced_metrics"] = {
-                "confidence_score": demo.get("confidence_score", 50),
-                "reasoning_quality": demo.get("reasoning_quality", "medium"),
-                "data_sources_count": len(demo.get("data_sources", [])),
-                "expected_outcome": demo.get("expected_status", "questionable")
-            }
-            
-            return jsonify(result), 200
+        if data.get('timings') or request.args.get('timings') == '1':
+            # Per-stage breakdown of this request, in milliseconds; not coalesced
+            # so the breakdown reflects work done for this request
+            with collect_timings() as timings:
+                result = apply_profile(verify_with_context(explanation, domain, **options), profile)
+            result["timings"] = {name: round(seconds * 1000, 3) for name, seconds in timings.items()}
         else:
-            # Run standard verification for novel input
-            result = verify_explanation(explanation, domain)
-            
-            result["similarity_match"] = {
-                "found": False,
-                "message": "This appears to be a novel scenario. Analysis is based on general principles."
-            }
-            
-            return jsonify(result), 200
+            result = apply_profile(verify_coalesced(explanation, domain, **options), profile)
+        return respond(result, 200, packed)
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/verify/incremental', methods=['POST'])
+def verify_incremental_endpoint():
+    """
+    Verify an explanation, or re-verify an earlier result after edits.
+    Body: {"explanation", "domain"} to start, then {"handle", "edits": [{"start", "end", "text"}]}
+    with offsets into the text behind the handle. Every response has a new "handle".
+    """
+    try:
+        data = request.json
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        handle = data.get('handle')
+        explanation = data.get('explanation', '')
+        
+        if handle is None and not explanation:
+            return jsonify({"error": "No explanation or handle provided"}), 400
+        try:
+            options = scoring_options(data)
+            profile = response_profile(data if data.get('profile') else request.args)
+            result = verify_incremental(explanation, data.get('domain', 'agriculture'), handle, data.get('edits', []),
+                                        bool(data.get('refresh_similarity')), **options)
+        except UnknownHandle as e:
+            return jsonify({"error": str(e)}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        return jsonify(apply_profile(result, profile)), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/verify/live', methods=['POST'])
+def verify_live():
+    """Stream per-claim results and metric deltas as Server-Sent Events while verifying"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    explanation = data.get('explanation', '')
+    domain = data.get('domain', 'agriculture')
+    
+    if not explanation:
+        return jsonify({"error": "No explanation provided"}), 400
+    try:
+        options = scoring_options(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def events():
+        try:
+            for event, payload in live_events(explanation, domain, **options):
+                yield sse_event(event, payload)
+        except Exception as e:
+            yield sse_event("error", {"error": str(e)})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/api/verify/batch', methods=['POST'])
+def verify_batch():
+    """Verify a list of explanations in parallel, returning results in input order"""
+    try:
+        data = request.json
+        explanations = data.get('explanations', [])
+        domain = data.get('domain', 'agriculture')
+        
+        if not isinstance(explanations, list) or not explanations:
+            return jsonify({"error": "No explanations provided"}), 400
+        if len(explanations) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large (max {MAX_BATCH_SIZE} explanations)"}), 413
+        try:
+            options = scoring_options(data)
+            profile = response_profile(data if data.get('profile') else request.args)
+            packed = wants_msgpack(request.args, request.headers)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        results = verify_explanations(explanations, domain, **options)
+        summary = summarize_results([r["result"] for r in results if r["success"]])
+        for r in results:
+            if r["success"]:
+                r["result"] = apply_profile(r["result"], profile)
+        
+        return respond({
+            "success": True,
+            "count": len(results),
+            "errors": sum(1 for r in results if not r["success"]),
+            "summary": summary,
+            "results": results
+        }, 200, packed)
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/verify/stream', methods=['POST'])
+def verify_stream_endpoint():
+    """Verify an NDJSON (or ?format=csv) request body, streaming one NDJSON result per record"""
+    fmt = request.args.get('format', 'ndjson')
+    domain = request.args.get('domain', 'agriculture')
+    column = request.args.get('column', 'explanation')
+    
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    try:
+        options = scoring_options(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Body is consumed line by line while the response is being written
+    lines = verify_stream(request.stream, fmt, domain, column, max_workers=STREAM_WORKERS, **options)
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
 @app.route('/api/examples', methods=['GET'])
 def get_examples():
-    """Get all demo examples for different scenarios"""
-    return jsonify(DEMO_EXAMPLES), 200
+    """Get demo examples (optionally ?offset=&limit=&fields=) from a precomputed, compressed payload"""
+    try:
+        status, body, headers = examples_response(request.args, request.headers)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return Response(body, status=status, headers=headers)
 
 @app.route('/api/random-demo', methods=['GET'])
 def get_random_example():
@@ -109,24 +246,107 @@ def search_similar():
         if not user_input:
             return jsonify({"error": "No input provided"}), 400
         
-        matches = search_similar_demos(user_input, threshold)
-        
-        if matches:
-            return jsonify({
-                "success": True,
-                "matches_found": len(matches),
-                "matches": matches
-            }), 200
-        else:
-            return jsonify({
-                "success": True,
-                "matches_found": 0,
-                "message": "No similar scenarios found. This appears to be a novel case."
-            }), 200
+        return jsonify(search_similar_response(user_input, threshold)), 200
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/scenarios', methods=['GET'])
+def scenarios_info():
+    """Report the scenario corpus size, version and source file"""
+    return jsonify({
+        "count": len(DEMO_EXAMPLES),
+        "version": DEMO_EXAMPLES.version,
+        "source": DEMO_EXAMPLES.source
+    }), 200
+
+@app.route('/api/scenarios', methods=['POST'])
+def add_scenarios():
+    """Add scenarios (one object, a list, or {"scenarios": [...]}), replacing any with the same id"""
+    try:
+        data = request.json
+        records = data.get('scenarios', [data]) if isinstance(data, dict) else data
+        if not isinstance(records, list) or not records:
+            return jsonify({"error": "No scenarios provided"}), 400
+        try:
+            outcome = DEMO_EXAMPLES.add(records)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(dict(outcome, success=True, count=len(DEMO_EXAMPLES))), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _scenario_id(value):
+    # Generated scenarios use integer ids; curated ones may use strings, digit-only ones too
+    if value.isdigit() and DEMO_EXAMPLES.get(int(value)) is not None:
+        return int(value)
+    return value
+
+@app.route('/api/scenarios/<scenario_id>', methods=['GET'])
+def get_scenario(scenario_id):
+    """Get one scenario by id"""
+    scenario = DEMO_EXAMPLES.get(_scenario_id(scenario_id))
+    if scenario is None:
+        return jsonify({"error": "Scenario not found"}), 404
+    return jsonify({"success": True, "scenario": scenario}), 200
+
+@app.route('/api/scenarios/<scenario_id>', methods=['DELETE'])
+def remove_scenario(scenario_id):
+    """Remove one scenario by id"""
+    outcome = DEMO_EXAMPLES.remove([_scenario_id(scenario_id)])
+    if not outcome["removed"]:
+        return jsonify({"error": "Scenario not found"}), 404
+    return jsonify({"success": True, "version": outcome["version"], "count": len(DEMO_EXAMPLES)}), 200
+
+@app.route('/api/scenarios/reload', methods=['POST'])
+def reload_scenarios():
+    """Re-read the corpus source file, re-indexing only scenarios that changed"""
+    try:
+        outcome = DEMO_EXAMPLES.reload()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify(dict(outcome, success=True, count=len(DEMO_EXAMPLES))), 200
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Report verification result and per-claim cache counters"""
+    results = dict(RESULT_CACHE.stats(), enabled=True) if RESULT_CACHE is not None else {"enabled": False}
+    return jsonify({
+        "results": results,
+        "claims": claim_cache_stats()
+    }), 200
+
+@app.route('/api/rules', methods=['GET'])
+def rules_info():
+    """List the loaded domain rule packs"""
+    RULES.reload_if_changed()
+    return jsonify({
+        "default_domain": RULES.default,
+        "version": RULES.version,
+        "last_error": RULES.last_error,
+        "domains": {
+            domain: {"description": pack.description, "fingerprint": pack.fingerprint}
+            for domain, pack in ((domain, RULES.get(domain)) for domain in RULES.domains())
+        }
+    }), 200
+
+@app.route('/api/rules/reload', methods=['POST'])
+def reload_rules():
+    """Re-read every rule pack; on error the previous rules stay active"""
+    try:
+        RULES.reload()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"success": True, "version": RULES.version, "domains": RULES.domains()}), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text-format metrics"""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5001))
     app.run(host='0.0.0.0', port=port, debug=True)
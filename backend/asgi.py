@@ -0,0 +1,199 @@
+"""ASGI variant of the ExplAInCheck API for holding many concurrent connections.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+
+CPU-bound work (verification, similarity search) runs in a process pool so
+the event loop only does I/O. At most ASGI_WORKERS jobs run at once and at
+most ASGI_MAX_QUEUE more may wait for a worker; beyond that, requests are
+rejected with 429 Too Many Requests instead of piling up. SIMILARITY_SHARDS
+is ignored here: the workers already search in parallel.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from demo_data import DEMO_EXAMPLES, get_random_demo, get_similarity_index
+from service import (MSGPACK_MIMETYPE, apply_profile, examples_response, pack_msgpack, pipeline_option,
+                     response_profile, scoring_options, search_similar_response, verify_flight_key,
+                     verify_with_context, wants_msgpack)
+from singleflight import AsyncSingleFlight
+
+# Worker processes, i.e. CPU-bound jobs running at once
+ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', os.cpu_count() or 1))
+
+# Jobs allowed to wait for a free worker before requests get 429s
+ASGI_MAX_QUEUE = int(os.environ.get('ASGI_MAX_QUEUE', 256))
+
+
+class QueueFull(Exception):
+    """Raised when the worker pool's wait queue is at capacity"""
+
+
+class WorkerPool:
+    """Process pool with a concurrency limit and a bounded wait queue."""
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self._executor = None
+        self._slots = None
+
+    def start(self):
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._slots = asyncio.Semaphore(self.workers)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn`` in a worker process, raising QueueFull if too many jobs are waiting"""
+        if self.pending >= self.workers + self.max_queue:
+            raise QueueFull()
+        # Only the event loop thread touches the counter, so no lock is needed
+        self.pending += 1
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.pending -= 1
+
+
+pool = WorkerPool(ASGI_WORKERS, ASGI_MAX_QUEUE)
+verify_flights = AsyncSingleFlight('verify')
+
+
+def error(message: str, status: int) -> JSONResponse:
+    headers = {"Retry-After": "1"} if status == 429 else None
+    return JSONResponse({"error": message}, status_code=status, headers=headers)
+
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def home(request):
+    return JSONResponse({
+        "message": "ExplAInCheck API - Agriculture Track 🌽",
+        "status": "running",
+        "version": "2.0.0",
+        "server": "asgi",
+        "endpoints": {
+            "/api/verify": "POST - Verify AI explanations with detailed analysis (profile=minimal|standard|full, pipeline=fast|nlp, ?format=msgpack)",
+            "/api/examples": "GET - Get demo examples (?offset=&limit=&fields=)",
+            "/api/random-demo": "GET - Get random demo scenario",
+            "/api/search-similar": "POST - Find similar scenarios (fuzzy matching)"
+        }
+    })
+
+
+async def verify(request):
+    """Main endpoint to verify AI explanations with enhanced analysis"""
+    data = await read_json(request)
+    if data is None:
+        return error("Request body must be a JSON object", 400)
+
+    explanation = data.get('explanation', '')
+    domain = data.get('domain', 'agriculture')
+    if not explanation:
+        return error("No explanation provided", 400)
+    try:
+        options = dict(scoring_options(data), **pipeline_option(data))
+        profile = response_profile(data if data.get('profile') else request.query_params)
+        packed = wants_msgpack(request.query_params, request.headers)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    try:
+        # Identical requests already in flight share that job instead of queueing another
+        key = verify_flight_key(explanation, domain, options)
+        result = await verify_flights.do(key, pool.run, verify_with_context, explanation, domain, **options)
+    except QueueFull:
+        return error("Server busy, try again later", 429)
+    except Exception as e:
+        return error(str(e), 500)
+    result = apply_profile(result, profile)
+    if packed:
+        return Response(pack_msgpack(result), media_type=MSGPACK_MIMETYPE)
+    return JSONResponse(result)
+
+
+async def get_examples(request):
+    """Get demo examples (optionally ?offset=&limit=&fields=) from a precomputed, compressed payload"""
+    try:
+        status, body, headers = examples_response(request.query_params, request.headers)
+    except ValueError as e:
+        return error(str(e), 400)
+    return Response(body, status_code=status, headers=headers)
+
+
+async def get_random_example(request):
+    """Get a random demo scenario for testing"""
+    return JSONResponse({
+        "success": True,
+        "demo": get_random_demo()
+    })
+
+
+async def search_similar(request):
+    """Search for similar demo scenarios based on user input"""
+    data = await read_json(request)
+    if data is None:
+        return error("Request body must be a JSON object", 400)
+
+    user_input = data.get('input', '')
+    threshold = data.get('threshold', 0.6)
+    if not user_input:
+        return error("No input provided", 400)
+
+    try:
+        result = await pool.run(search_similar_response, user_input, threshold)
+    except QueueFull:
+        return error("Server busy, try again later", 429)
+    except Exception as e:
+        return error(str(e), 500)
+    return JSONResponse(result)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Workers are forked from this process and can't share shard processes
+    # started here (each would start its own), so they search in-process
+    DEMO_EXAMPLES.shards = 0
+    # Build the similarity index before forking so workers inherit it
+    get_similarity_index()
+    pool.start()
+    try:
+        yield
+    finally:
+        pool.shutdown()
+
+
+app = Starlette(
+    routes=[
+        Route('/api', home),
+        Route('/api/verify', verify, methods=['POST']),
+        Route('/api/examples', get_examples, methods=['GET']),
+        Route('/api/random-demo', get_random_example, methods=['GET']),
+        Route('/api/search-similar', search_similar, methods=['POST']),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan
+)
@@ -0,0 +1,264 @@
+"""Benchmarks for the verification pipeline.
+
+Usage:
+    python benchmark.py                                  # all stages, default sizes
+    python benchmark.py --stages verify,search --json run.json
+    python benchmark.py --json new.json --compare run.json --tolerance 0.15
+    python benchmark.py --stages search --shards 4        # sharded vs in-process search
+
+Each benchmark reports ops/sec, mean and p50/p95/p99 latency per operation
+and peak traced memory, over the DEMO_EXAMPLES corpus and synthetic longer
+explanations, scaled over text length (verify, claims, parse, pipeline) and corpus
+size (search). --compare exits with status 1 if any benchmark's p50 got
+slower by more than --tolerance relative to the saved run.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+from aggregate import aggregate_claims
+from demo_data import DEMO_EXAMPLES
+from pipeline import Pipeline
+from sharding import ShardedSimilarityIndex
+from similarity import SimilarityIndex
+from verifier import clear_claim_cache, parse_claims, verify_claim, verify_explanation
+
+STAGES = ("claims", "verify", "aggregate", "search", "parse", "pipeline")
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Linearly interpolated percentile of already sorted values"""
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def measure(name: str, fn: Callable, inputs: Sequence, repeat: int = 3, warmup: int = 1,
+            setup: Optional[Callable] = None, **params) -> Dict:
+    """
+    Time ``fn(x)`` for every input, ``repeat`` times, after ``warmup`` untimed
+    passes; ``setup`` runs before every call (e.g. to clear caches). Peak
+    memory comes from one extra traced pass so tracing doesn't skew timings.
+    """
+    for _ in range(warmup):
+        for value in inputs:
+            if setup:
+                setup()
+            fn(value)
+
+    latencies = []
+    gc.collect()
+    for _ in range(repeat):
+        for value in inputs:
+            if setup:
+                setup()
+            start = time.perf_counter()
+            fn(value)
+            latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    for value in inputs:
+        if setup:
+            setup()
+        fn(value)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "name": name,
+        "params": params,
+        "ops": len(latencies),
+        "ops_per_sec": round(len(latencies) / total, 2) if total else 0.0,
+        "mean_ms": round(total / len(latencies) * 1000, 4) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+        "peak_kb": round(peak / 1024, 1)
+    }
+
+
+def synthetic_explanations(count: int, sentences: int, rng: random.Random) -> List[str]:
+    """Explanations of roughly ``sentences`` sentences stitched from the demo corpus"""
+    pool = [claim for demo in DEMO_EXAMPLES for claim in parse_claims(demo["explanation"])]
+    return ['. '.join(rng.choice(pool) for _ in range(sentences)) + '.' for _ in range(count)]
+
+
+def synthetic_corpus(size: int, rng: random.Random) -> List[Dict]:
+    """``size`` scenarios: the demo corpus, extended with shuffled-sentence variants"""
+    scenarios = [dict(demo) for demo in DEMO_EXAMPLES[:size]]
+    pool = [claim for demo in DEMO_EXAMPLES for claim in parse_claims(demo["explanation"])]
+    while len(scenarios) < size:
+        base = rng.choice(DEMO_EXAMPLES)
+        text = '. '.join(rng.sample(pool, 4)) + '.'
+        scenarios.append(dict(base, id=len(scenarios) + 1, explanation=text))
+    return scenarios
+
+
+def run(stages: Sequence[str], lengths: Sequence[int], sizes: Sequence[int], samples: int,
+        repeat: int, seed: int, spacy_model: Optional[str] = None, shards: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    demo_texts = [demo["explanation"] for demo in DEMO_EXAMPLES][:samples]
+    texts_by_length = {length: synthetic_explanations(samples, length, rng) for length in lengths}
+    results = []
+
+    if "claims" in stages:
+        claims = [claim for text in demo_texts for claim in parse_claims(text)]
+        results.append(measure("parse_claims", parse_claims, demo_texts, repeat, corpus="demo"))
+        results.append(measure("verify_claim.cold", lambda c: verify_claim(c, 'agriculture'), claims, repeat,
+                               setup=clear_claim_cache, corpus="demo"))
+        results.append(measure("verify_claim.memoized", lambda c: verify_claim(c, 'agriculture'), claims, repeat,
+                               corpus="demo"))
+
+    if "verify" in stages:
+        verify = lambda text: verify_explanation(text, use_cache=False)
+        results.append(measure("verify_explanation.cold", verify, demo_texts, repeat,
+                               setup=clear_claim_cache, corpus="demo"))
+        results.append(measure("verify_explanation.cached", verify_explanation, demo_texts, repeat, corpus="demo"))
+        for length, texts in texts_by_length.items():
+            results.append(measure("verify_explanation.cold", verify, texts, repeat,
+                                   setup=clear_claim_cache, sentences=length))
+
+    if "aggregate" in stages:
+        for length, texts in texts_by_length.items():
+            claim_lists = [verify_explanation(text, use_cache=False)["claims"] for text in texts]
+            results.append(measure("aggregate_claims", lambda batch: aggregate_claims(batch, texts),
+                                   [claim_lists], repeat, sentences=length, batch=len(texts)))
+
+    if "search" in stages:
+        queries = [text[:120] for text in demo_texts]
+        for size in sizes:
+            corpus = synthetic_corpus(size, rng)
+            index = SimilarityIndex(corpus)
+            results.append(measure("search_similar", lambda q: index.search(q, 0.6, top_k=5), queries, repeat,
+                                   corpus_size=size))
+            if shards > 1:
+                sharded = ShardedSimilarityIndex(corpus, shards)
+                try:
+                    results.append(measure("search_similar.sharded", lambda q: sharded.search(q, 0.6, top_k=5),
+                                           queries, repeat, corpus_size=size, shards=shards))
+                finally:
+                    sharded.close()
+
+    if "pipeline" in stages:
+        fast = Pipeline()
+        analyze = lambda text: fast.verify(text, use_cache=False)
+        results.append(measure("pipeline.fast", analyze, demo_texts, repeat, corpus="demo"))
+        for length, texts in texts_by_length.items():
+            results.append(measure("pipeline.fast", analyze, texts, repeat, sentences=length))
+
+    if "parse" in stages:
+        try:
+            from parser import DEFAULT_MODEL, ExplanationParser
+            parser = ExplanationParser(spacy_model or DEFAULT_MODEL)
+            parser.nlp
+        except (ImportError, OSError) as e:
+            print(f"Skipping parse benchmarks: {e}", file=sys.stderr)
+        else:
+            results.append(measure("parse_explanation", parser.parse_explanation, demo_texts, repeat, corpus="demo"))
+            for length, texts in texts_by_length.items():
+                results.append(measure("parse_explanation", parser.parse_explanation, texts, repeat,
+                                       sentences=length))
+    return results
+
+
+def result_key(result: Dict) -> str:
+    params = ",".join(f"{key}={value}" for key, value in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[Dict]:
+    """Pair results with the baseline run by name and params; flags p50 slowdowns beyond ``tolerance``"""
+    previous = {result_key(result): result for result in baseline}
+    rows = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or not old["p50_ms"]:
+            continue
+        change = result["p50_ms"] / old["p50_ms"] - 1
+        rows.append({"benchmark": result_key(result), "baseline_p50_ms": old["p50_ms"],
+                     "p50_ms": result["p50_ms"], "change": round(change, 4), "regression": change > tolerance})
+    return rows
+
+
+def print_table(results: List[Dict]) -> None:
+    print(f"{'benchmark':<52} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KB':>9}")
+    for result in results:
+        print(f"{result_key(result):<52} {result['ops_per_sec']:>10.1f} {result['p50_ms']:>9.3f} "
+              f"{result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['peak_kb']:>9.1f}")
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(',') if part.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ExplAInCheck verification pipeline.")
+    parser.add_argument('--stages', default=",".join(STAGES), help=f"comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument('--lengths', type=_int_list, default=[4, 16, 64],
+                        help="sentences per synthetic explanation (default: 4,16,64)")
+    parser.add_argument('--sizes', type=_int_list, default=[100, 500, 2000],
+                        help="corpus sizes for search (default: 100,500,2000)")
+    parser.add_argument('--samples', type=int, default=100, help="inputs per benchmark (default: 100)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed passes over the inputs (default: 3)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for synthetic inputs (default: 0)")
+    parser.add_argument('--shards', type=int, default=0,
+                        help="also benchmark search sharded over this many processes (default: off)")
+    parser.add_argument('--spacy-model', help="spaCy model or path for the parse stage")
+    parser.add_argument('--json', dest='output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="JSON file from an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="allowed p50 slowdown before --compare fails (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    stages = [stage.strip() for stage in args.stages.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    results = run(stages, args.lengths, args.sizes, args.samples, args.repeat, args.seed, args.spacy_model, args.shards)
+    print_table(results)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+        },
+        "results": results
+    }
+
+    status = 0
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        report["comparison"] = compare(results, baseline, args.tolerance)
+        print()
+        for row in report["comparison"]:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['benchmark']:<52} {row['baseline_p50_ms']:>9.3f} -> {row['p50_ms']:>9.3f} "
+                  f"({row['change']:+.1%}) {flag}")
+        if any(row["regression"] for row in report["comparison"]):
+            status = 1
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Content-addressed cache for verification results."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# SQLite writes between prunes of expired and surplus rows
+DB_PRUNE_INTERVAL = 64
+
+
+def cache_key(text: str, *parts) -> str:
+    """Hash the exact text (results carry offsets into it) with anything else the result depends on"""
+    digest = hashlib.sha256(text.encode('utf-8'))
+    for part in parts:
+        digest.update(b"\x00" + str(part).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU cache with optional TTL and an optional SQLite backing store.
+
+    Values are stored as JSON, so every ``get`` returns a fresh copy that
+    callers may mutate. With ``db_path`` set, entries are also written to
+    SQLite and survive restarts; the file may be shared by several processes.
+    Writes prune it to the ``max_size`` newest unexpired rows. Disk access
+    happens outside the lock that guards the in-memory entries, so lookups
+    answered from memory never wait for it.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = None, db_path: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self._db_lock = threading.Lock()
+        self._db_writes = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[1], now):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[0])
+
+        if self.db_path:
+            entry = self._db_get(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            # Keep whichever is newer if the key was set meanwhile
+            current = self._entries.get(key)
+            if current is None or current[1] < entry[1]:
+                self._store(key, entry)
+            self.hits += 1
+        return json.loads(entry[0])
+
+    def set(self, key: str, value: Dict) -> None:
+        entry = (json.dumps(value), time.time())
+        with self._lock:
+            self._store(key, entry)
+        if self.db_path:
+            self._db_set(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            with self._db_lock:
+                self._connection().execute("DELETE FROM results")
+                self._connection().commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "persistent": bool(self.db_path)
+            }
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _store(self, key: str, entry: tuple) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so open one per process
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results "
+                             "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _db_get(self, key: str, now: float) -> Optional[tuple]:
+        with self._db_lock:
+            row = self._connection().execute("SELECT value, created FROM results WHERE key = ?",
+                                             (key,)).fetchone()
+        if row is None or self._expired(row[1], now):
+            return None  # expired rows are pruned by writes
+        return row
+
+    def _db_set(self, key: str, entry: tuple) -> None:
+        with self._db_lock:
+            connection = self._connection()
+            connection.execute("INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)",
+                               (key, entry[0], entry[1]))
+            self._db_writes += 1
+            if self._db_writes % DB_PRUNE_INTERVAL == 0:
+                self._db_prune(connection, entry[1])
+            connection.commit()
+
+    def _db_prune(self, connection: sqlite3.Connection, now: float) -> None:
+        # Drop expired rows, then all but the max_size newest
+        if self.ttl is not None:
+            connection.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        connection.execute("DELETE FROM results WHERE created <= "
+                           "(SELECT created FROM results ORDER BY created DESC LIMIT 1 OFFSET ?)",
+                           (self.max_size,))
@@ -0,0 +1,280 @@
+"""Compact columnar storage for the scenario corpus.
+
+Scenarios are stored struct-of-arrays: fixed-width numeric columns, interned
+codes for repeated strings (domain, category, status, reasoning quality and
+whole data_sources lists), and one UTF-8 blob plus an offsets column per
+free-text field. Integer ids get a numeric column; if any id is a string,
+all ids are stored as JSON text instead, so ids round-trip with their type. Files are memory-mapped read-only, so opening even a very
+large corpus takes milliseconds and forked workers share the same pages.
+
+Usage:
+    python corpus.py build scenarios.bin                     # from the generated demo scenarios
+    python corpus.py build scenarios.bin --from data.jsonl   # from a JSON/JSONL file
+    python corpus.py info scenarios.bin
+
+Point SCENARIO_CORPUS at the file to have demo_data load it instead of
+generating scenarios.
+"""
+
+import argparse
+import json
+import mmap
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterable, List
+
+MAGIC = b"EXCORP1\x00"
+
+# Field order of a scenario dict, matching demo_data
+FIELDS = ("id", "title", "domain", "category", "explanation", "expected_status",
+          "confidence_score", "reasoning_quality", "data_sources")
+
+# Repeated string fields stored as codes into a per-file table
+CATEGORICAL = ("domain", "category", "expected_status", "reasoning_quality")
+
+# Free-text fields stored as offsets into a UTF-8 blob
+TEXT = ("title", "explanation")
+
+DEFAULTS = {"domain": "agriculture", "confidence_score": 50, "reasoning_quality": "medium"}
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def encode_records(records: Iterable[Dict]) -> bytes:
+    """Serialize scenario dicts into the columnar file format"""
+    count = 0
+    ids = array('q')
+    id_texts = bytearray()
+    id_offsets = array('Q', [0])
+    confidence = array('i')
+    codes = {field: array('H') for field in CATEGORICAL}
+    tables: Dict[str, List] = {field: [] for field in CATEGORICAL}
+    lookup: Dict[str, Dict] = {field: {} for field in CATEGORICAL}
+    sources = array('I')
+    tables["data_sources"] = []
+    lookup["data_sources"] = {}
+    offsets = {field: array('Q', [0]) for field in TEXT}
+    blobs = {field: bytearray() for field in TEXT}
+
+    for record in records:
+        count += 1
+        scenario_id = record["id"]
+        id_texts += json.dumps(scenario_id, ensure_ascii=False).encode('utf-8')
+        id_offsets.append(len(id_texts))
+        if ids is not None:
+            if isinstance(scenario_id, int) and not isinstance(scenario_id, bool):
+                ids.append(scenario_id)
+            else:
+                ids = None
+        confidence.append(int(record.get("confidence_score", DEFAULTS["confidence_score"])))
+        for field in CATEGORICAL:
+            value = record.get(field, DEFAULTS.get(field))
+            if value not in lookup[field]:
+                lookup[field][value] = len(tables[field])
+                tables[field].append(value)
+            codes[field].append(lookup[field][value])
+        value = tuple(record.get("data_sources", ()))
+        if value not in lookup["data_sources"]:
+            lookup["data_sources"][value] = len(tables["data_sources"])
+            tables["data_sources"].append(list(value))
+        sources.append(lookup["data_sources"][value])
+        for field in TEXT:
+            blobs[field] += record[field].encode('utf-8')
+            offsets[field].append(len(blobs[field]))
+
+    id_encoding = "int" if ids is not None else "json"
+    if ids is not None:
+        columns = [("id", ids)]
+    else:
+        columns = [("id_offsets", id_offsets), ("id_blob", id_texts)]
+    columns += [("confidence_score", confidence), ("data_sources", sources)]
+    columns += [(field, codes[field]) for field in CATEGORICAL]
+    columns += [(field + "_offsets", offsets[field]) for field in TEXT]
+    columns += [(field + "_blob", blobs[field]) for field in TEXT]
+
+    # Column offsets are relative to the (8-byte aligned) start of the data section
+    layout = {}
+    position = 0
+    for name, data in columns:
+        raw = data.tobytes() if isinstance(data, array) else bytes(data)
+        typecode = data.typecode if isinstance(data, array) else 'B'
+        layout[name] = [position, len(raw), typecode]
+        position = _align(position + len(raw))
+
+    header = json.dumps({
+        "count": count,
+        "byteorder": sys.byteorder,
+        "id_encoding": id_encoding,
+        "tables": tables,
+        "columns": layout
+    }, ensure_ascii=False).encode('utf-8')
+    data_start = _align(len(MAGIC) + 4 + len(header))
+
+    out = bytearray(MAGIC + len(header).to_bytes(4, 'little') + header)
+    for name, data in columns:
+        out += b"\x00" * (data_start + layout[name][0] - len(out))
+        out += data.tobytes() if isinstance(data, array) else data
+    return bytes(out)
+
+
+class ScenarioStore(Sequence):
+    """Read-only sequence of scenarios backed by columnar buffers.
+
+    Indexing returns a freshly built scenario dict with the same keys as the
+    generated demo scenarios; whole columns are available through
+    ``column()`` and ``codes()`` without materializing any rows.
+    """
+
+    def __init__(self, buffer, source=None):
+        self._source = source
+        view = memoryview(buffer)
+        # Every view is kept so close() can release them before unmapping
+        self._views = [view]
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a scenario corpus file")
+        header_length = int.from_bytes(view[len(MAGIC):len(MAGIC) + 4], 'little')
+        header_end = len(MAGIC) + 4 + header_length
+        header = json.loads(bytes(view[len(MAGIC) + 4:header_end]))
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError("Scenario corpus was written on a machine with different byte order")
+
+        self._count = header["count"]
+        self._tables = header["tables"]
+        self._json_ids = header.get("id_encoding", "int") == "json"
+        data = view[_align(header_end):]
+        self._views.append(data)
+        self._columns = {}
+        for name, (offset, length, typecode) in header["columns"].items():
+            column = data[offset:offset + length]
+            self._views.append(column)
+            if typecode != 'B':
+                column = column.cast(typecode)
+                self._views.append(column)
+            self._columns[name] = column
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "ScenarioStore":
+        """Build an in-memory store from scenario dicts"""
+        return cls(encode_records(records))
+
+    @classmethod
+    def load(cls, path: str) -> "ScenarioStore":
+        """Memory-map a corpus file written by ``save`` or ``python corpus.py build``"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, source=mapped)
+
+    @staticmethod
+    def save(records: Iterable[Dict], path: str) -> None:
+        """Write scenario dicts to ``path`` in the columnar format"""
+        with open(path, 'wb') as f:
+            f.write(encode_records(records))
+
+    def close(self) -> None:
+        """Release the buffers (and the memory map, if any)"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._columns = {}
+        if isinstance(self._source, mmap.mmap):
+            self._source.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("scenario index out of range")
+
+        columns = self._columns
+        tables = self._tables
+        return {
+            "id": self._id(index),
+            "title": self.text("title", index),
+            "domain": tables["domain"][columns["domain"][index]],
+            "category": tables["category"][columns["category"][index]],
+            "explanation": self.text("explanation", index),
+            "expected_status": tables["expected_status"][columns["expected_status"][index]],
+            "confidence_score": columns["confidence_score"][index],
+            "reasoning_quality": tables["reasoning_quality"][columns["reasoning_quality"][index]],
+            "data_sources": list(tables["data_sources"][columns["data_sources"][index]])
+        }
+
+    def _id(self, index: int):
+        if self._json_ids:
+            return json.loads(self.text("id", index))
+        return self._columns["id"][index]
+
+    def text(self, field: str, index: int) -> str:
+        """One free-text field of one scenario, without building the rest of the row"""
+        offsets = self._columns[field + "_offsets"]
+        return str(self._columns[field + "_blob"][offsets[index]:offsets[index + 1]], 'utf-8')
+
+    def codes(self, field: str):
+        """Codes of a categorical field (a memoryview) and the table they index into"""
+        return self._columns[field], self._tables[field]
+
+    def column(self, field: str) -> List:
+        """All values of one field, decoded"""
+        if field in CATEGORICAL:
+            codes, table = self.codes(field)
+            return [table[code] for code in codes]
+        if field in TEXT:
+            return [self.text(field, i) for i in range(self._count)]
+        if field == "data_sources":
+            table = self._tables["data_sources"]
+            return [list(table[code]) for code in self._columns["data_sources"]]
+        if field == "id" and self._json_ids:
+            return [self._id(i) for i in range(self._count)]
+        return self._columns[field].tolist()
+
+
+def read_records(path: str) -> List[Dict]:
+    """Read scenario dicts from a JSON array or JSONL file"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect columnar scenario corpus files.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="write a corpus file")
+    build.add_argument('output')
+    build.add_argument('--from', dest='source', help="JSON/JSONL scenarios (default: generated demo scenarios)")
+    build.add_argument('--seed', type=int, help="seed for the generated demo scenarios")
+    info = commands.add_parser('info', help="summarize a corpus file")
+    info.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        if args.source:
+            records = read_records(args.source)
+        else:
+            from demo_data import generate_demo_scenarios
+            records = generate_demo_scenarios(args.seed)
+        ScenarioStore.save(records, args.output)
+        print(f"Wrote {len(records)} scenarios to {args.output}")
+    else:
+        store = ScenarioStore.load(args.path)
+        codes, table = store.codes("expected_status")
+        counts = {status: 0 for status in table}
+        for code in codes:
+            counts[table[code]] += 1
+        print(json.dumps({"scenarios": len(store), "expected_status": counts,
+                          "categories": store.codes("category")[1]}, indent=2, ensure_ascii=False))
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
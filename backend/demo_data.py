@@ -1,15 +1,19 @@
 # 500 Comprehensive Agriculture Demo Scenarios for ExplAInCheck
 # Auto-generated scenarios covering diverse agricultural domains
 
+import os
 import random
 
+from scenarios import ScenarioCorpus
+
 # Base categories and parameters for scenario generation
 CROP_TYPES = ["banana", "corn", "wheat", "rice", "soybean", "tomato", "potato", "cotton", "sugarcane", "coffee"]
 ISSUES = ["irrigation", "pest_control", "fertilization", "harvest", "soil", "disease", "weather", "equipment"]
 SEVERITIES = ["minor", "moderate", "severe", "critical"]
 
-def generate_demo_scenarios():
-    """Generate 500 diverse agriculture scenarios"""
+def generate_demo_scenarios(seed=None):
+    """Generate 500 diverse agriculture scenarios (reproducibly when a seed is given)"""
+    rng = random.Random(seed)
     scenarios = []
     
     # Manually crafted high-quality scenarios (first 100)
@@ -130,9 +134,9 @@ def generate_demo_scenarios():
     
     # Generate remaining 490 scenarios programmatically with variations
     for i in range(11, 501):
-        scenario_type = random.choice(["valid", "invalid", "questionable"])
-        crop = random.choice(CROP_TYPES)
-        issue_type = random.choice(ISSUES)
+        scenario_type = rng.choice(["valid", "invalid", "questionable"])
+        crop = rng.choice(CROP_TYPES)
+        issue_type = rng.choice(ISSUES)
         
         if scenario_type == "valid":
             scenarios.append({
@@ -140,9 +144,9 @@ def generate_demo_scenarios():
                 "title": f"✅ {crop.title()} {issue_type.replace('_', ' ').title()} - Scenario {i}",
                 "domain": "agriculture",
                 "category": issue_type,
-                "explanation": f"Evidence-based recommendation for {crop} {issue_type.replace('_', ' ')} management. Analysis includes soil conditions (pH 6.5, moisture 65%), weather forecast (temp 22-28°C, rainfall 40mm expected), historical yield data showing 15% improvement with this approach, and pest pressure monitoring indicating {random.choice(['low', 'moderate'])} risk. Root zone analysis supports this timing.",
+                "explanation": f"Evidence-based recommendation for {crop} {issue_type.replace('_', ' ')} management. Analysis includes soil conditions (pH 6.5, moisture 65%), weather forecast (temp 22-28°C, rainfall 40mm expected), historical yield data showing 15% improvement with this approach, and pest pressure monitoring indicating {rng.choice(['low', 'moderate'])} risk. Root zone analysis supports this timing.",
                 "expected_status": "valid",
-                "confidence_score": random.randint(80, 95),
+                "confidence_score": rng.randint(80, 95),
                 "reasoning_quality": "high",
                 "data_sources": ["sensor_network", "satellite_imagery", "historical_records", "lab_analysis"]
             })
@@ -154,7 +158,7 @@ def generate_demo_scenarios():
                 "category": issue_type,
                 "explanation": f"Apply excessive treatment for {crop} without testing. Use maximum rates regardless of conditions. Ignore safety guidelines and environmental factors. Treat all areas uniformly without assessment.",
                 "expected_status": "invalid",
-                "confidence_score": random.randint(5, 20),
+                "confidence_score": rng.randint(5, 20),
                 "reasoning_quality": "very_low",
                 "data_sources": []
             })
@@ -166,51 +170,28 @@ def generate_demo_scenarios():
                 "category": issue_type,
                 "explanation": f"General recommendation for {crop} {issue_type.replace('_', ' ')}. Standard approach may help. Consider applying treatment. Results may vary.",
                 "expected_status": "questionable",
-                "confidence_score": random.randint(35, 55),
+                "confidence_score": rng.randint(35, 55),
                 "reasoning_quality": "medium",
                 "data_sources": ["general_guidelines"]
             })
     
     return scenarios
 
-# Generate all scenarios
-DEMO_EXAMPLES = generate_demo_scenarios()
+# Generate all scenarios (set DEMO_SEED for a reproducible corpus), or load them
+# from SCENARIO_CORPUS: a JSON/JSONL, SQLite or columnar corpus file (see scenarios.py)
+if os.environ.get('SCENARIO_CORPUS'):
+    DEMO_EXAMPLES = ScenarioCorpus.from_file(os.environ['SCENARIO_CORPUS'])
+else:
+    DEMO_EXAMPLES = ScenarioCorpus(generate_demo_scenarios(int(os.environ['DEMO_SEED']) if os.environ.get('DEMO_SEED') else None))
 
 def get_random_demo():
     """Return a random demo for frontend"""
     return random.choice(DEMO_EXAMPLES)
 
+def get_similarity_index():
+    """Return the similarity index over DEMO_EXAMPLES, building it on first use"""
+    return DEMO_EXAMPLES.index
+
 def search_similar_demos(user_input, threshold=0.6):
     """Find similar demos based on user input using fuzzy matching"""
-    import difflib
-    
-    user_lower = user_input.lower()
-    matches = []
-    
-    for demo in DEMO_EXAMPLES:
-        explanation_lower = demo["explanation"].lower()
-        title_lower = demo["title"].lower()
-        
-        # Calculate similarity scores
-        explanation_ratio = difflib.SequenceMatcher(None, user_lower, explanation_lower).ratio()
-        title_ratio = difflib.SequenceMatcher(None, user_lower, title_lower).ratio()
-        
-        # Check for keyword matches
-        keywords = ["irrigation", "water", "pest", "fertilizer", "harvest", "soil", "disease", 
-                   "spray", "plant", "crop", "yield"]
-        keyword_matches = sum(1 for kw in keywords if kw in user_lower and kw in explanation_lower)
-        keyword_score = keyword_matches / len(keywords)
-        
-        # Combined score
-        overall_score = max(explanation_ratio, title_ratio) + (keyword_score * 0.3)
-        
-        if overall_score >= threshold:
-            matches.append({
-                "demo": demo,
-                "similarity": overall_score,
-                "match_type": "similar_scenario"
-            })
-    
-    # Sort by similarity
-    matches.sort(key=lambda x: x["similarity"], reverse=True)
-    return matches[:5] if matches else None  # Return top 5 matches
+    return DEMO_EXAMPLES.search(user_input, threshold, top_k=5)  # Return top 5 matches
@@ -0,0 +1,115 @@
+"""Incremental re-verification of edited explanations.
+
+A verified text is remembered under a handle, together with its per-claim
+results. A later request sends the handle plus edits (character spans of
+that text and their replacement), and only claims whose text changed go
+through ``verify_claim`` again; see ``verifier.reverify_explanation``.
+Every result gets a new handle, so edits can be chained, and old handles
+stay usable until they age out of the store.
+"""
+
+import hashlib
+import os
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from cache import ResultCache
+from rules import RULES
+from verifier import reverify_explanation
+
+# Remembered texts; the least recently used are dropped beyond this many
+INCREMENTAL_SESSIONS = int(os.environ.get('INCREMENTAL_SESSIONS', 1000))
+
+# Seconds a handle stays valid after it was issued
+INCREMENTAL_TTL = float(os.environ.get('INCREMENTAL_TTL', 3600))
+
+SESSIONS = ResultCache(max_size=INCREMENTAL_SESSIONS, ttl=INCREMENTAL_TTL)
+
+
+class UnknownHandle(LookupError):
+    """Raised for a handle that was never issued or has expired"""
+
+
+def session_handle(text: str, domain: str, scoring: Optional[str], seed) -> str:
+    """Handle for a text and its verification settings (exact text: offsets depend on it)"""
+    digest = hashlib.sha256(text.encode('utf-8'))
+    for part in (domain, scoring, seed):
+        digest.update(b"\x00" + str(part).encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def remember(result: Dict, scoring: Optional[str] = None, seed: Optional[Union[int, str]] = None,
+             context: Optional[Dict] = None) -> str:
+    """
+    Keep a verification result's text and claims for later edits and return
+    its handle. ``context`` holds extra response fields (e.g. similarity)
+    carried over to results derived from this one.
+    """
+    text, domain = result["original_text"], result["domain"]
+    handle = session_handle(text, domain, scoring, seed)
+    SESSIONS.set(handle, {
+        "text": text,
+        "domain": domain,
+        "scoring": scoring,
+        "seed": seed,
+        "fingerprint": RULES.get(domain).fingerprint,
+        "claims": result["claims"],
+        "context": context or {}
+    })
+    return handle
+
+
+def apply_edits(text: str, edits: List[Dict]) -> str:
+    """
+    Apply edits ({"start", "end", "text"}: replace text[start:end]) to ``text``.
+    Offsets refer to ``text`` before any edit; spans must not overlap.
+    Raises ValueError for malformed edits.
+    """
+    if not isinstance(edits, list):
+        raise ValueError("edits must be a list")
+    spans = []
+    for edit in edits:
+        if not isinstance(edit, dict):
+            raise ValueError("each edit must be an object with start, end and text")
+        start, end, replacement = edit.get('start'), edit.get('end'), edit.get('text', '')
+        if (isinstance(start, bool) or isinstance(end, bool) or not isinstance(start, int)
+                or not isinstance(end, int) or not 0 <= start <= end <= len(text)):
+            raise ValueError(f"edit span must satisfy 0 <= start <= end <= {len(text)}")
+        if not isinstance(replacement, str):
+            raise ValueError("edit text must be a string")
+        spans.append((start, end, replacement))
+
+    spans.sort(key=lambda span: span[:2])
+    pieces = []
+    position = 0
+    for start, end, replacement in spans:
+        if start < position:
+            raise ValueError("edits must not overlap")
+        pieces.append(text[position:start])
+        pieces.append(replacement)
+        position = end
+    pieces.append(text[position:])
+    return ''.join(pieces)
+
+
+def verify_edits(handle: str, edits: List[Dict],
+                 refresh: Optional[Callable[[str], Dict]] = None) -> Tuple[Dict, str, Dict]:
+    """
+    Re-verify the text behind ``handle`` after ``edits``. Returns the result
+    (shaped like verify_explanation's), its new handle and the context,
+    carried over or, with ``refresh``, rebuilt from the edited text.
+    Raises UnknownHandle or ValueError.
+    """
+    state = SESSIONS.get(handle) if isinstance(handle, str) else None
+    if state is None:
+        raise UnknownHandle("Unknown or expired handle; verify the full text again")
+
+    text = apply_edits(state["text"], edits)
+    if not text.strip():
+        raise ValueError("Edited explanation is empty")
+
+    domain = state["domain"]
+    # Per-claim results are only reusable under the rules they were made with
+    previous = state["claims"] if state["fingerprint"] == RULES.get(domain).fingerprint else []
+    result = reverify_explanation(text, domain, previous, state["scoring"], state["seed"])
+    context = refresh(text) if refresh else state["context"]
+    return result, remember(result, state["scoring"], state["seed"], context), context
@@ -0,0 +1,175 @@
+"""Lightweight counters and histograms for the verification hot path.
+
+Code marks its stages with ``with stage("parse_claims"): ...`` and counts
+work with ``count(...)``. Observations feed process-wide metrics that
+``render_prometheus`` serves in the Prometheus text format, and, inside a
+``collect_timings()`` block, a per-request timing breakdown.
+
+Set METRICS_ENABLED=0 to turn recording off; ``stage`` then hands back a
+shared no-op context manager and ``count`` returns immediately, so the
+instrumented code pays only a function call.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_NOOP = nullcontext()
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('timings', default=None)
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...], extra: str = '') -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels"""
+
+    def __init__(self, name: str, help_text: str, buckets=STAGE_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), then sum and count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bucket] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, observations) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = 'le="%s"' % ('+Inf' if bound == float('inf') else f'{bound:g}')
+                    lines.append(f"{self.name}_bucket{_label_text(labels, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_label_text(labels)} {total:.6f}")
+                lines.append(f"{self.name}_count{_label_text(labels)} {observations}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("explaincheck_stage_seconds", "Time spent per verification stage")
+WORK_TOTAL = Counter("explaincheck_items_total", "Work items processed, by kind")
+REQUEST_SECONDS = Histogram("explaincheck_request_seconds", "HTTP request latency by endpoint")
+
+_metrics = [STAGE_SECONDS, WORK_TOTAL, REQUEST_SECONDS]
+
+# Callables returning {name: (help, type, [(labels dict, value)])}, read at scrape time
+_collectors: List[Callable[[], Dict]] = []
+
+
+def register_collector(collector: Callable[[], Dict]) -> None:
+    """Add a callable whose metrics (e.g. existing cache stats) are read on every scrape"""
+    _collectors.append(collector)
+
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        if METRICS_ENABLED:
+            STAGE_SECONDS.observe(elapsed, stage=self.name)
+        timings = _timings.get()
+        if timings is not None:
+            timings[self.name] = timings.get(self.name, 0.0) + elapsed
+        return False
+
+
+def stage(name: str):
+    """Context manager timing a named stage (a no-op when nothing is recording)"""
+    if not METRICS_ENABLED and _timings.get() is None:
+        return _NOOP
+    return _Stage(name)
+
+
+def count(kind: str, amount: float = 1) -> None:
+    """Add to the work counter for ``kind`` (claims, similarity candidates, ...)"""
+    if METRICS_ENABLED:
+        WORK_TOTAL.inc(amount, kind=kind)
+
+
+def observe_request(endpoint: str, seconds: float) -> None:
+    if METRICS_ENABLED:
+        REQUEST_SECONDS.observe(seconds, endpoint=endpoint)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """
+    Gather per-stage durations (seconds) of everything run in this block
+    into the yielded dict, regardless of METRICS_ENABLED.
+    """
+    timings: Dict[str, float] = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        for name, (help_text, kind, samples) in collector().items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_label_text(tuple(sorted(labels.items())))} {value:g}")
+    return "\n".join(lines) + "\n"
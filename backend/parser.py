@@ -1,35 +1,111 @@
 """Parser module for extracting logical statements from AI explanations."""
 
+import os
 import re
-from typing import List, Dict, Any
-import spacy
+import threading
+from typing import List, Dict, Any, Iterable, Tuple
 
-# Load spaCy model for NLP processing
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("Downloading spaCy model...")
-    import os
-    os.system("python -m spacy download en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+DEFAULT_MODEL = "en_core_web_sm"
+
+# Components ExplanationParser never reads; sentences come from the parser, entities from ner
+DEFAULT_DISABLE = ("tagger", "attribute_ruler", "lemmatizer")
+
+# Loaded pipelines shared across ExplanationParser instances, keyed by (model, disabled components)
+_pipelines: Dict[Tuple[str, Tuple[str, ...]], Any] = {}
+_pipelines_lock = threading.Lock()
+
+
+def load_pipeline(model: str = DEFAULT_MODEL, disable: Iterable[str] = ()):
+    """Return a shared spaCy pipeline, loading it on first use.
+    
+    spaCy itself is only imported here, so importing this module is cheap.
+    Call this before forking workers to share the loaded model between them.
+    Set SPACY_AUTO_DOWNLOAD=1 to download a missing model instead of failing.
+    """
+    key = (model, tuple(sorted(disable)))
+    nlp = _pipelines.get(key)
+    if nlp is not None:
+        return nlp
+
+    with _pipelines_lock:
+        nlp = _pipelines.get(key)
+        if nlp is None:
+            import spacy
+            try:
+                nlp = spacy.load(model, disable=list(key[1]))
+            except OSError:
+                if os.environ.get("SPACY_AUTO_DOWNLOAD") != "1":
+                    raise OSError(f"spaCy model '{model}' is not installed. "
+                                  f"Run: python -m spacy download {model}")
+                print("Downloading spaCy model...")
+                from spacy.cli import download
+                download(model)
+                nlp = spacy.load(model, disable=list(key[1]))
+            _pipelines[key] = nlp
+    return nlp
+
+
+def __getattr__(name):
+    # Backwards compatibility: the full pipeline used to be loaded at import as `nlp`
+    if name == "nlp":
+        return load_pipeline()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+STEP_MARKERS = ["first", "second", "third", "finally", "then", "next"]
+
+# Words joining a cause and an effect, tried in this order
+CAUSAL_CONNECTORS = ["because", "since", "therefore", "thus", "hence", "as a result",
+                     "consequently", "due to", "leads to", "causes"]
+
+# Whole words only, so "enthusiastic" doesn't split on "thus"
+_CAUSAL_REGEXES = [(connector, re.compile(r"\b%s\b" % re.escape(connector))) for connector in CAUSAL_CONNECTORS]
+
+
+def split_causal(sent_text: str):
+    """
+    Split a lower-cased sentence on the first causal connector found, as
+    {"cause": text before, "effect": text after, "connector"}, or None.
+    """
+    for pattern, regex in _CAUSAL_REGEXES:
+        parts = regex.split(sent_text, maxsplit=1)
+        if len(parts) == 2:
+            return {
+                "cause": parts[0].strip(),
+                "effect": parts[1].strip(),
+                "connector": pattern
+            }
+    return None
+
+
+ASSUMPTION_PATTERNS = [re.compile(pattern) for pattern in [
+    r"assuming",
+    r"if we assume",
+    r"given that",
+    r"provided that",
+    r"suppose",
+    r"let's say"
+]]
 
 
 class ExplanationParser:
     """Parse AI-generated explanations into logical statements."""
     
-    def __init__(self):
-        self.causal_patterns = [
-            r"because",
-            r"since",
-            r"therefore",
-            r"thus",
-            r"hence",
-            r"as a result",
-            r"consequently",
-            r"due to",
-            r"leads to",
-            r"causes"
-        ]
+    def __init__(self, model: str = DEFAULT_MODEL, disable: Iterable[str] = DEFAULT_DISABLE):
+        """
+        Args:
+            model: Name of the spaCy model to use
+            disable: Pipeline components to skip; the default keeps only what
+                sentence splitting and entity extraction need
+        """
+        self.model = model
+        self.disable = tuple(disable)
+        self.causal_patterns = list(CAUSAL_CONNECTORS)
+    
+    @property
+    def nlp(self):
+        """The shared spaCy pipeline for this parser's configuration, loaded on first use."""
+        return load_pipeline(self.model, self.disable)
         
     def parse_explanation(self, explanation: str) -> Dict[str, Any]:
         """Parse an explanation into structured logical components.
@@ -44,80 +120,60 @@ class ExplanationParser:
             - assumptions: List of implicit/explicit assumptions
             - causal_chains: List of cause-effect relationships
         """
-        doc = nlp(explanation)
-        
-        result = {
-            "sentences": self._extract_sentences(doc),
-            "logical_steps": self._extract_logical_steps(doc),
-            "assumptions": self._extract_assumptions(doc),
-            "causal_chains": self._extract_causal_chains(doc),
-            "entities": self._extract_entities(doc)
-        }
-        
-        return result
+        return self._parse_doc(self.nlp(explanation))
     
-    def _extract_sentences(self, doc) -> List[str]:
-        """Extract individual sentences from the text."""
-        return [sent.text.strip() for sent in doc.sents]
+    def parse_many(self, texts: Iterable[str], batch_size: int = 64, n_process: int = 1) -> List[Dict[str, Any]]:
+        """Parse many explanations at once with spaCy's batched ``nlp.pipe``.
+        
+        Args:
+            texts: The AI-generated explanation texts
+            batch_size: Number of texts spaCy processes per batch
+            n_process: Worker processes for spaCy to use (1 = in-process)
+            
+        Returns:
+            One parse_explanation() result per text, in input order
+        """
+        docs = self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+        return [self._parse_doc(doc) for doc in docs]
     
-    def _extract_logical_steps(self, doc) -> List[Dict[str, str]]:
-        """Extract logical reasoning steps from the explanation."""
+    def _parse_doc(self, doc) -> Dict[str, Any]:
+        """Extract all components from a processed doc in a single sentence pass."""
+        sentences = []
         steps = []
-        step_markers = ["first", "second", "third", "finally", "then", "next"]
+        assumptions = []
+        causal_chains = []
         
         for i, sent in enumerate(doc.sents):
+            content = sent.text.strip()
             sent_text = sent.text.lower()
-            for marker in step_markers:
+            sentences.append(content)
+            
+            # Logical reasoning steps
+            for marker in STEP_MARKERS:
                 if marker in sent_text:
                     steps.append({
                         "step": i + 1,
                         "marker": marker,
-                        "content": sent.text.strip()
+                        "content": content
                     })
                     break
+            
+            # Assumptions
+            if any(pattern.search(sent_text) for pattern in ASSUMPTION_PATTERNS):
+                assumptions.append(content)
+            
+            # Cause-effect relationships: split sentence on the first causal word found
+            chain = split_causal(sent_text)
+            if chain is not None:
+                causal_chains.append(chain)
         
-        return steps
-    
-    def _extract_assumptions(self, doc) -> List[str]:
-        """Extract assumptions from the explanation."""
-        assumptions = []
-        assumption_patterns = [
-            r"assuming",
-            r"if we assume",
-            r"given that",
-            r"provided that",
-            r"suppose",
-            r"let's say"
-        ]
-        
-        for sent in doc.sents:
-            sent_text = sent.text.lower()
-            for pattern in assumption_patterns:
-                if re.search(pattern, sent_text):
-                    assumptions.append(sent.text.strip())
-                    break
-        
-        return assumptions
-    
-    def _extract_causal_chains(self, doc) -> List[Dict[str, str]]:
-        """Extract cause-effect relationships."""
-        causal_chains = []
-        
-        for sent in doc.sents:
-            sent_text = sent.text.lower()
-            for pattern in self.causal_patterns:
-                if re.search(pattern, sent_text):
-                    # Split sentence on causal word
-                    parts = re.split(pattern, sent_text, maxsplit=1)
-                    if len(parts) == 2:
-                        causal_chains.append({
-                            "cause": parts[0].strip(),
-                            "effect": parts[1].strip(),
-                            "connector": pattern
-                        })
-                    break
-        
-        return causal_chains
+        return {
+            "sentences": sentences,
+            "logical_steps": steps,
+            "assumptions": assumptions,
+            "causal_chains": causal_chains,
+            "entities": self._extract_entities(doc)
+        }
     
     def _extract_entities(self, doc) -> List[Dict[str, str]]:
         """Extract named entities and key terms."""
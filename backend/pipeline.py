@@ -0,0 +1,249 @@
+"""One-pass analysis of an explanation, feeding the verifier.
+
+``Pipeline.verify`` splits an explanation into claims once and scans each
+claim with the domain's rule matcher once. That single scan drives the
+claim's verification (``classify_claim``), and the same pass collects the
+claim's numeric entities and causal chain. Chains are then checked against
+each other for contradictions (one cause, opposite effects) and circular
+reasoning.
+
+With ``nlp``, claims and entities come from one spaCy parse instead (see
+parser.load_pipeline), and numeric entities spaCy finds, such as numbers
+written as words, count as numbers for verification. The NLP stage is
+optional: without it nothing beyond the regex fast path runs, and if the
+model can't be loaded the fast path is used and the result says so.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+from aggregate import aggregate_claims
+from cache import cache_key
+from instrumentation import count, stage
+from parser import DEFAULT_DISABLE, DEFAULT_MODEL, load_pipeline, split_causal
+from rules import RULES, RulePack
+from sentences import iter_claims
+from verifier import (RESULT_CACHE, RESULT_FORMAT, SCORING_MODE, SCORING_MODES, build_result,
+                      classify_claim)
+
+# spaCy model (name or path) for the NLP stage
+PIPELINE_SPACY_MODEL = os.environ.get('PIPELINE_SPACY_MODEL', DEFAULT_MODEL)
+
+PIPELINE_MODES = ("fast", "nlp")
+
+# spaCy entity labels standing for numbers and measured amounts
+NUMERIC_LABELS = ("CARDINAL", "QUANTITY", "PERCENT", "MONEY")
+
+# Connectors whose cause comes after them ("X because Y")
+CAUSE_FOLLOWS = ("because", "since", "due to")
+
+# Word overlap (Jaccard) at which two phrases count as the same
+SAME_PHRASE = 0.5
+
+_INCREASE = frozenset({"increase", "increases", "increased", "more", "higher", "raise", "raises", "improve",
+                       "improves", "boost", "boosts", "rise", "rises", "promote", "promotes", "faster"})
+_DECREASE = frozenset({"decrease", "decreases", "decreased", "less", "lower", "reduce", "reduces", "reduced",
+                       "fewer", "drop", "drops", "harm", "harms", "damage", "damages", "prevent", "prevents",
+                       "inhibit", "inhibits", "slower"})
+_STOPWORDS = frozenset({"a", "an", "the", "of", "to", "in", "on", "at", "by", "for", "with", "and", "or", "is",
+                        "are", "be", "it", "its", "this", "that", "these", "will", "can", "your", "you", "their"})
+
+_WORD = re.compile(r"[a-z]+")
+# A number not inside a word or decimal, and the token right after it
+_NUMBER = re.compile(r"(?<![\w.])(\d+(?:[.,]\d+)?)(?:\s*([%°]\w?|[A-Za-z]+(?:/[A-Za-z]+)?))?")
+
+
+class Pipeline:
+    """Claim splitting, entities and causal chains from one pass, verified in the same pass."""
+
+    def __init__(self, nlp: bool = False, model: str = PIPELINE_SPACY_MODEL):
+        self.nlp = nlp
+        self.model = model
+        self.nlp_error: Optional[str] = None
+
+    def _spacy(self):
+        if not self.nlp or self.nlp_error:
+            return None
+        try:
+            return load_pipeline(self.model, DEFAULT_DISABLE)
+        except (ImportError, OSError) as e:
+            self.nlp_error = str(e)
+            return None
+
+    def parse(self, explanation: str, rules: RulePack) -> Tuple[List[Dict], bool]:
+        """
+        Claims of ``explanation`` as {"text", "start", "end", "hits", "entities"},
+        plus whether spaCy produced them.
+        """
+        nlp = self._spacy()
+        if nlp is None:
+            claims = []
+            for claim in iter_claims(explanation):
+                hits = rules.matcher.scan(claim.text)
+                claims.append({"text": claim.text, "start": claim.start, "end": claim.end, "hits": hits,
+                               "entities": _quantities(claim.text, claim.start, rules)})
+            return claims, False
+
+        claims = []
+        for sent in nlp(explanation).sents:
+            text = sent.text.strip()
+            if not text:
+                continue
+            start = sent.start_char + len(sent.text) - len(sent.text.lstrip())
+            hits = rules.matcher.scan(text)
+            entities = [{"text": ent.text, "label": ent.label_, "start": ent.start_char, "end": ent.end_char}
+                        for ent in sent.ents]
+            numeric = [entity["text"] for entity in entities if entity["label"] in NUMERIC_LABELS]
+            if numeric and "number" not in hits:
+                hits["number"] = numeric
+            claims.append({"text": text, "start": start, "end": start + len(text), "hits": hits,
+                           "entities": entities})
+        return claims, True
+
+    def verify(self, explanation: str, domain: str = 'agriculture', scoring: Optional[str] = None,
+               seed: Optional[Union[int, str]] = None, use_cache: bool = True) -> Dict:
+        """
+        A verify_explanation() result with "entities", "causal_chains" and
+        "causal_issues" added; contradictory or circular chains make an
+        otherwise valid explanation questionable.
+        """
+        scoring = scoring or SCORING_MODE
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"scoring must be one of {SCORING_MODES}")
+        rules = RULES.get(domain)
+
+        caching = use_cache and RESULT_CACHE is not None
+        key = cache_key(explanation, domain, scoring, seed, RESULT_FORMAT, rules.fingerprint,
+                        "pipeline", self.model if self.nlp else None)
+        if caching:
+            result = RESULT_CACHE.get(key)
+            if result is not None:
+                return result
+
+        with stage("parse_claims"):
+            parsed, used_nlp = self.parse(explanation, rules)
+        count("claims", len(parsed))
+
+        claims, entities, chains = [], [], []
+        with stage("verify_claims"):
+            for index, claim in enumerate(parsed):
+                verification = classify_claim(claim["text"], claim["hits"], scoring, seed)
+                verification["start"] = claim["start"]
+                verification["end"] = claim["end"]
+                claims.append(verification)
+                entities.extend(dict(entity, claim=index) for entity in claim["entities"])
+                chain = causal_chain(claim["text"])
+                if chain is not None:
+                    chains.append(dict(chain, claim=index))
+
+        with stage("aggregate"):
+            aggregate = aggregate_claims([claims], [explanation])[0]
+        with stage("causal_check"):
+            causal_issues = check_causal_chains(chains)
+        with stage("report"):
+            result = build_result(explanation, domain, claims, aggregate)
+        result["entities"] = entities
+        result["causal_chains"] = chains
+        result["causal_issues"] = causal_issues
+        if causal_issues:
+            if result["overall_status"] == "valid":
+                result["overall_status"] = "questionable"
+            # The quality-standards note no longer holds
+            result["recommendations"] = [rec for rec in result["recommendations"] if not rec.startswith("✅")]
+            result["recommendations"].append(
+                "🔗 Resolve the conflicting cause-effect statements: " +
+                "; ".join(issue["message"] for issue in causal_issues[:3]))
+        result["pipeline"] = {"nlp": used_nlp}
+        if self.nlp and not used_nlp:
+            result["pipeline"]["nlp_error"] = self.nlp_error
+
+        # A fallback result isn't what the NLP key promises; don't cache it
+        if caching and used_nlp == self.nlp:
+            RESULT_CACHE.set(key, result)
+        return result
+
+
+def causal_chain(claim: str) -> Optional[Dict]:
+    """The claim's {"cause", "effect", "connector"}, oriented so "cause" is the cause, or None"""
+    chain = split_causal(claim.lower())
+    if chain is None:
+        return None
+    if chain["connector"] in CAUSE_FOLLOWS:
+        chain["cause"], chain["effect"] = chain["effect"], chain["cause"]
+    return chain
+
+
+def check_causal_chains(chains: List[Dict]) -> List[Dict]:
+    """
+    Pairs of chains that contradict each other (same cause, one effect going
+    up and the other down on the same subject) or form a circle (each one's
+    effect is the other's cause).
+    """
+    words = [(_content_words(chain["cause"]), _content_words(chain["effect"])) for chain in chains]
+    issues = []
+    for i in range(len(chains)):
+        cause_i, effect_i = words[i]
+        for j in range(i + 1, len(chains)):
+            cause_j, effect_j = words[j]
+            pair = [chains[i]["claim"], chains[j]["claim"]]
+            if _same(cause_i, cause_j) and _opposed(effect_i, effect_j):
+                issues.append({
+                    "type": "contradiction",
+                    "claims": pair,
+                    "message": f"claims {pair[0] + 1} and {pair[1] + 1} give opposite effects "
+                               f"for \"{chains[i]['cause']}\""
+                })
+            elif _same(cause_i, effect_j) and _same(effect_i, cause_j):
+                issues.append({
+                    "type": "circular",
+                    "claims": pair,
+                    "message": f"claims {pair[0] + 1} and {pair[1] + 1} each justify the other"
+                })
+    return issues
+
+
+def _content_words(phrase: str) -> frozenset:
+    return frozenset(word for word in _WORD.findall(phrase) if word not in _STOPWORDS)
+
+
+def _same(a: frozenset, b: frozenset) -> bool:
+    return bool(a and b) and len(a & b) / len(a | b) >= SAME_PHRASE
+
+
+def _opposed(a: frozenset, b: frozenset) -> bool:
+    directions = _INCREASE | _DECREASE
+    if not _same(a - directions, b - directions):
+        return False  # different subjects ("raises yield", "reduces pests")
+    return bool((a & _INCREASE and b & _DECREASE) or (a & _DECREASE and b & _INCREASE))
+
+
+def _quantities(text: str, offset: int, rules: RulePack) -> List[Dict]:
+    """Numbers in a claim, labelled QUANTITY when followed by one of the pack's units"""
+    unit = rules.matcher.pattern("unit")
+    entities = []
+    for match in _NUMBER.finditer(text):
+        following = match.group(2)
+        if following and unit is not None and unit.match(following):
+            label, end = ("PERCENT" if following == "%" else "QUANTITY"), match.end()
+        else:
+            label, end = "CARDINAL", match.end(1)
+        entities.append({"text": text[match.start():end], "label": label,
+                         "start": offset + match.start(), "end": offset + end})
+    return entities
+
+
+_pipelines: Dict[bool, Pipeline] = {}
+_pipelines_lock = threading.Lock()
+
+
+def get_pipeline(mode: str = 'fast') -> Pipeline:
+    """The shared Pipeline for ``mode`` ("fast" or "nlp")"""
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"pipeline must be one of {', '.join(PIPELINE_MODES)}")
+    with _pipelines_lock:
+        pipeline = _pipelines.get(mode)
+        if pipeline is None:
+            pipeline = _pipelines[mode] = Pipeline(nlp=mode == 'nlp')
+        return pipeline
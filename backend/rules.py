@@ -0,0 +1,269 @@
+r"""Per-domain keyword rule packs for claim verification, each compiled once into a single-pass matcher.
+
+A rule pack is a JSON file in RULE_PACKS_DIR named after its domain:
+
+    {
+      "domain": "irrigation",
+      "extends": "agriculture",          (optional: inherit, then add/override)
+      "keywords": {"data": [...], "hedge": [...], "dangerous": [...], "vague": [...]},
+      "patterns": {"number": "\\d", "unit": "(mm|kg|...)"}
+    }
+
+Keywords are literal phrases matched case-insensitively; patterns are
+case-sensitive regexes. Changed files are picked up on the fly (see
+RuleRegistry), so rules can be edited without a restart.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Pattern
+
+# Directory of <domain>.json rule packs
+RULE_PACKS_DIR = os.environ.get('RULE_PACKS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rule_packs'))
+
+# Domain whose rules apply to requests for a domain without a pack
+DEFAULT_DOMAIN = os.environ.get('DEFAULT_RULE_DOMAIN', 'agriculture')
+
+# Seconds between checks for changed rule pack files; 0 disables hot reload
+RULES_RELOAD_INTERVAL = float(os.environ.get('RULES_RELOAD_INTERVAL', 5))
+
+
+class RuleMatcher:
+    """Classify text against a rule table compiled once.
+
+    All literal phrases are compiled into a single alternation inside a
+    lookahead and matched against the lower-cased text in one pass, so the
+    cost stays flat as phrases are added. Phrases are ordered longest first;
+    every shorter phrase that is a prefix of the phrase found at a position
+    matches there too, so overlapping phrases (e.g. "may help" and "may")
+    are all reported, as with an Aho-Corasick automaton. The alternation
+    is laid out as a trie, so each position costs one walk down the trie
+    rather than one attempt per phrase. Regex rules are
+    few and case-sensitive, so each is searched on the original text.
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]], patterns: Dict[str, str]):
+        # phrase -> categories it belongs to
+        phrase_categories: Dict[str, List[str]] = {}
+        for category, phrases in keywords.items():
+            for phrase in phrases:
+                phrase_categories.setdefault(phrase.lower(), []).append(category)
+        phrases = sorted(phrase_categories, key=len, reverse=True)
+
+        # Everything that fires when a given phrase is the longest match at a position
+        self._phrase_hits = {
+            phrase: [(other, category)
+                     for other in phrases if phrase.startswith(other)
+                     for category in phrase_categories[other]]
+            for phrase in phrases
+        }
+        self._literals = re.compile("(?=(%s))" % _trie_pattern(phrases) if phrases else "(?!)")
+        self._patterns = [(category, re.compile(pattern)) for category, pattern in patterns.items()]
+
+    def pattern(self, category: str) -> Optional[Pattern]:
+        """The compiled regex rule for ``category``, if the table has one"""
+        for name, regex in self._patterns:
+            if name == category:
+                return regex
+        return None
+
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        """Return category -> matched terms (first-seen order) for every category that fired."""
+        hits: Dict[str, List[str]] = {}
+
+        for match in self._literals.finditer(text.lower()):
+            for phrase, category in self._phrase_hits[match.group(1)]:
+                terms = hits.setdefault(category, [])
+                if phrase not in terms:
+                    terms.append(phrase)
+
+        for category, pattern in self._patterns:
+            match = pattern.search(text)
+            if match:
+                hits.setdefault(category, []).append(match.group(0))
+
+        return hits
+
+
+def _trie_pattern(phrases: List[str]) -> str:
+    """Build a regex matching the longest of ``phrases`` by walking a character trie."""
+    trie: Dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + render(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:%s)" % "|".join(branches)
+        if terminal:
+            # Greedy optional: prefer extending to a longer phrase
+            return "(?:%s)?" % body
+        return body
+
+    return render(trie)
+
+
+class RulePack:
+    """A domain's merged rules, compiled matcher and content fingerprint"""
+
+    def __init__(self, domain: str, keywords: Dict[str, List[str]], patterns: Dict[str, str],
+                 description: str = ''):
+        self.domain = domain
+        self.description = description
+        self.keywords = keywords
+        self.patterns = patterns
+        self.matcher = RuleMatcher(keywords, patterns)
+        # Changes whenever the effective rules change; part of verification cache keys
+        canonical = json.dumps([keywords, patterns], sort_keys=True, ensure_ascii=False)
+        self.fingerprint = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def read_rule_pack(path: str) -> Dict:
+    """Load and check one rule pack file, raising ValueError if it is malformed"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            pack = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{path}: {e}")
+
+    name = os.path.basename(path)
+    if not isinstance(pack, dict):
+        raise ValueError(f"{name}: rule pack must be an object")
+    keywords = pack.get('keywords', {})
+    patterns = pack.get('patterns', {})
+    if not isinstance(keywords, dict) or not all(
+            isinstance(phrases, list) and all(isinstance(p, str) and p for p in phrases)
+            for phrases in keywords.values()):
+        raise ValueError(f"{name}: keywords must map categories to lists of phrases")
+    if not isinstance(patterns, dict) or not all(isinstance(p, str) for p in patterns.values()):
+        raise ValueError(f"{name}: patterns must map categories to regex strings")
+    for category, pattern in patterns.items():
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"{name}: bad {category} pattern: {e}")
+    if pack.get('extends') is not None and not isinstance(pack['extends'], str):
+        raise ValueError(f"{name}: extends must be a domain name")
+    return pack
+
+
+def _merge(parent: Dict, child: Dict) -> Dict:
+    keywords = {category: list(phrases) for category, phrases in parent.get('keywords', {}).items()}
+    for category, phrases in child.get('keywords', {}).items():
+        merged = keywords.setdefault(category, [])
+        merged.extend(phrase for phrase in phrases if phrase not in merged)
+    return {
+        'keywords': keywords,
+        'patterns': dict(parent.get('patterns', {}), **child.get('patterns', {})),
+        'description': child.get('description', parent.get('description', ''))
+    }
+
+
+class RuleRegistry:
+    """Rule packs of every domain in a directory, compiled once and hot-reloaded.
+
+    ``get(domain)`` returns the compiled pack (falling back to the default
+    domain). At most every ``reload_interval`` seconds it also checks the
+    pack files' modification times and recompiles if any changed, so
+    edits go live in every process without a restart. A pack that fails
+    to load leaves the previous rules in place.
+    """
+
+    def __init__(self, directory: str = RULE_PACKS_DIR, default: str = DEFAULT_DOMAIN,
+                 reload_interval: float = RULES_RELOAD_INTERVAL):
+        self.directory = directory
+        self.default = default
+        self.reload_interval = reload_interval
+        self.version = 0
+        self.last_error: Optional[str] = None
+        self._packs: Dict[str, RulePack] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def domains(self) -> List[str]:
+        return sorted(self._packs)
+
+    def get(self, domain: str) -> RulePack:
+        if self.reload_interval and time.monotonic() - self._checked >= self.reload_interval:
+            self.reload_if_changed()
+        packs = self._packs
+        return packs.get(domain) or packs[self.default]
+
+    def reload_if_changed(self) -> bool:
+        """Reload if pack files were added, removed or modified; returns whether rules were swapped"""
+        self._checked = time.monotonic()
+        if self._scan_mtimes() == self._mtimes:
+            return False
+        try:
+            self.reload()
+        except ValueError as e:
+            self.last_error = str(e)
+            return False
+        return True
+
+    def reload(self) -> Dict[str, RulePack]:
+        """Read and compile every pack, swapping them in only if all succeed; raises ValueError"""
+        with self._lock:
+            mtimes = self._scan_mtimes()
+            raw = {}
+            for filename in mtimes:
+                pack = read_rule_pack(os.path.join(self.directory, filename))
+                raw[pack.get('domain') or filename[:-len('.json')]] = pack
+
+            resolved: Dict[str, Dict] = {}
+
+            def resolve(domain, seen=()):
+                if domain in resolved:
+                    return resolved[domain]
+                if domain in seen:
+                    raise ValueError(f"Rule pack inheritance cycle: {' -> '.join(seen + (domain,))}")
+                if domain not in raw:
+                    raise ValueError(f"Rule pack extends unknown domain '{domain}'")
+                pack = raw[domain]
+                parent = resolve(pack['extends'], seen + (domain,)) if pack.get('extends') else {}
+                resolved[domain] = _merge(parent, pack)
+                return resolved[domain]
+
+            packs = {}
+            for domain in raw:
+                merged = resolve(domain)
+                previous = self._packs.get(domain)
+                compiled = RulePack(domain, merged['keywords'], merged['patterns'], merged['description'])
+                # Keep the already compiled pack when its rules didn't change
+                packs[domain] = previous if previous and previous.fingerprint == compiled.fingerprint else compiled
+            if self.default not in packs:
+                raise ValueError(f"No rule pack for the default domain '{self.default}' in {self.directory}")
+
+            self._packs = packs
+            self._mtimes = mtimes
+            self._checked = time.monotonic()
+            self.last_error = None
+            self.version += 1
+            return packs
+
+    def _scan_mtimes(self) -> Dict[str, float]:
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith('.json'))
+        except OSError:
+            return {}
+        mtimes = {}
+        for name in names:
+            try:
+                mtimes[name] = os.stat(os.path.join(self.directory, name)).st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+
+RULES = RuleRegistry()
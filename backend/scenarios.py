@@ -0,0 +1,428 @@
+"""Scenario corpus loading, validation and runtime updates.
+
+Scenarios can come from JSON/JSONL files, a SQLite table or a columnar
+corpus file (see corpus.py); ``load_scenarios`` picks the loader from the
+file extension and ``register_loader`` plugs in others. A ``ScenarioCorpus``
+keeps the scenarios in order, validates additions against the scenario
+schema and applies adds/removes to its similarity index incrementally, so
+curated scenarios go live without a rebuild or restart.
+"""
+
+import bisect
+import json
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from corpus import ScenarioStore, read_records
+from sharding import SIMILARITY_SHARDS, ShardedSimilarityIndex
+from similarity import SimilarityIndex
+
+EXPECTED_STATUSES = ("valid", "invalid", "questionable")
+REASONING_QUALITIES = ("high", "medium", "low", "very_low")
+
+# Field name -> (accepted types, required)
+SCHEMA = {
+    "id": ((int, str), True),
+    "title": (str, True),
+    "domain": (str, False),
+    "category": (str, True),
+    "explanation": (str, True),
+    "expected_status": (str, True),
+    "confidence_score": (int, False),
+    "reasoning_quality": (str, False),
+    "data_sources": (list, False)
+}
+
+DEFAULTS = {"domain": "agriculture", "confidence_score": 50, "reasoning_quality": "medium", "data_sources": []}
+
+
+def validate_scenario(record) -> Dict:
+    """Check a scenario against SCHEMA and return it with defaults filled in; raises ValueError"""
+    if not isinstance(record, dict):
+        raise ValueError("Scenario must be an object")
+
+    scenario = {}
+    for field, (types, required) in SCHEMA.items():
+        value = record.get(field)
+        if value is None:
+            if required:
+                raise ValueError(f"Scenario is missing required field '{field}'")
+            value = list(DEFAULTS[field]) if field == "data_sources" else DEFAULTS[field]
+        elif isinstance(value, bool) or not isinstance(value, types):
+            raise ValueError(f"Scenario field '{field}' has the wrong type")
+        scenario[field] = value
+
+    unknown = set(record) - set(SCHEMA)
+    if unknown:
+        raise ValueError(f"Unknown scenario field(s): {', '.join(sorted(unknown))}")
+    if isinstance(scenario["id"], str) and not scenario["id"].strip():
+        raise ValueError("Scenario id must not be empty")
+    for field in ("title", "category", "explanation"):
+        if not scenario[field].strip():
+            raise ValueError(f"Scenario field '{field}' must not be empty")
+    if scenario["expected_status"] not in EXPECTED_STATUSES:
+        raise ValueError(f"expected_status must be one of {', '.join(EXPECTED_STATUSES)}")
+    if scenario["reasoning_quality"] not in REASONING_QUALITIES:
+        raise ValueError(f"reasoning_quality must be one of {', '.join(REASONING_QUALITIES)}")
+    if not 0 <= scenario["confidence_score"] <= 100:
+        raise ValueError("confidence_score must be between 0 and 100")
+    if not all(isinstance(source, str) for source in scenario["data_sources"]):
+        raise ValueError("data_sources must be a list of strings")
+    return scenario
+
+
+def load_json(path: str) -> List[Dict]:
+    """Read scenarios from a JSON array or JSONL file"""
+    return read_records(path)
+
+
+def load_sqlite(path: str, table: str = 'scenarios') -> List[Dict]:
+    """
+    Read scenarios from a SQLite table with one column per scenario field;
+    data_sources is stored as a JSON array string.
+    """
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    connection.row_factory = sqlite3.Row
+    try:
+        rows = connection.execute(f'SELECT * FROM "{table}" ORDER BY rowid').fetchall()
+    finally:
+        connection.close()
+
+    scenarios = []
+    for row in rows:
+        record = {key: row[key] for key in row.keys() if row[key] is not None}
+        if isinstance(record.get("data_sources"), str):
+            record["data_sources"] = json.loads(record["data_sources"])
+        scenarios.append(record)
+    return scenarios
+
+
+def load_corpus_file(path: str) -> Sequence[Dict]:
+    """Memory-map a columnar corpus file written by corpus.py"""
+    return ScenarioStore.load(path)
+
+
+# File extension -> loader returning a sequence of scenario dicts
+LOADERS: Dict[str, Callable[[str], Sequence[Dict]]] = {
+    ".json": load_json,
+    ".jsonl": load_json,
+    ".ndjson": load_json,
+    ".db": load_sqlite,
+    ".sqlite": load_sqlite,
+    ".sqlite3": load_sqlite,
+    ".bin": load_corpus_file
+}
+
+
+def register_loader(extension: str, loader: Callable[[str], Sequence[Dict]]) -> None:
+    """Use ``loader`` for scenario files ending in ``extension``"""
+    LOADERS[extension.lower()] = loader
+
+
+def load_scenarios(path: str) -> Sequence[Dict]:
+    """Load scenarios with the loader registered for the file's extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in LOADERS:
+        raise ValueError(f"No scenario loader for '{extension}' files")
+    return LOADERS[extension](path)
+
+
+class ScenarioView(Sequence):
+    """Immutable scenario sequence: a base sequence plus replaced, removed and appended scenarios.
+
+    Positions number the base scenarios followed by the appended ones;
+    removed positions are skipped when indexing or iterating. ``changed``
+    derives a new view, copying only the changes, so updating a large or
+    memory-mapped base never copies or materializes it.
+    """
+
+    def __init__(self, base: Sequence[Dict] = (), replaced: Optional[Dict[int, Dict]] = None,
+                 removed: Iterable[int] = (), appended: Iterable[Dict] = ()):
+        self.base = base
+        self._replaced = replaced or {}
+        self._removed = sorted(removed)
+        self._removed_set = frozenset(self._removed)
+        self._appended = tuple(appended)
+
+    @property
+    def end(self) -> int:
+        """Position after the last appended scenario"""
+        return len(self.base) + len(self._appended)
+
+    @property
+    def overlay_size(self) -> int:
+        return len(self._replaced) + len(self._removed) + len(self._appended)
+
+    def __len__(self) -> int:
+        return self.end - len(self._removed)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            scenarios = []
+            position = self._position(start) if start < stop else self.end
+            while len(scenarios) < stop - start:
+                if position not in self._removed_set:
+                    scenarios.append(self.at(position))
+                position += 1
+            return scenarios
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("scenario index out of range")
+        return self.at(self._position(index))
+
+    def __iter__(self):
+        for position in range(self.end):
+            if position not in self._removed_set:
+                yield self.at(position)
+
+    def at(self, position: int) -> Dict:
+        """The scenario at a position (not an index: removed positions still count)"""
+        scenario = self._replaced.get(position)
+        if scenario is not None:
+            return scenario
+        if position < len(self.base):
+            return self.base[position]
+        return self._appended[position - len(self.base)]
+
+    def ids(self) -> Iterator[Tuple[int, object]]:
+        """(position, id) of every scenario, reading a ScenarioStore's id column without building rows"""
+        if isinstance(self.base, ScenarioStore):
+            base_ids = self.base.column("id")
+        else:
+            base_ids = (scenario["id"] for scenario in self.base)
+        for position, scenario_id in enumerate(base_ids):
+            if position not in self._removed_set:
+                yield position, scenario_id
+        for position in range(len(self.base), self.end):
+            if position not in self._removed_set:
+                yield position, self.at(position)["id"]
+
+    def changes(self) -> Tuple[List, List[Dict]]:
+        """Ids of the removed base scenarios, and the replaced or appended scenarios in position order"""
+        base_size = len(self.base)
+        removed = [self.base[position]["id"] for position in self._removed if position < base_size]
+        updated = [self.at(position) for position in sorted(self._replaced)]
+        updated += [self.at(position) for position in range(base_size, self.end)
+                    if position not in self._removed_set and position not in self._replaced]
+        return removed, updated
+
+    def changed(self, replaced: Optional[Dict[int, Dict]] = None, removed: Iterable[int] = (),
+                appended: Iterable[Dict] = ()) -> "ScenarioView":
+        """A new view with these changes on top; positions of existing scenarios are kept"""
+        removed = set(removed)
+        merged = dict(self._replaced)
+        merged.update(replaced or {})
+        for position in removed:
+            merged.pop(position, None)
+        return ScenarioView(self.base, merged, self._removed_set | removed, self._appended + tuple(appended))
+
+    def _position(self, index: int) -> int:
+        # Smallest position with index + 1 scenarios up to and including it
+        low, high = index, index + len(self._removed)
+        while low < high:
+            middle = (low + high) // 2
+            if middle + 1 - bisect.bisect_right(self._removed, middle) > index:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+
+class ScenarioCorpus(Sequence):
+    """Ordered, mutable scenario collection with an incrementally updated similarity index.
+
+    Reads (indexing, slicing, ``search``) see a consistent snapshot; updates
+    are serialized by a lock and bump ``version`` so callers can invalidate
+    anything derived from the corpus. Updates are kept as a ScenarioView
+    overlay on the loaded scenarios, so they cost time in proportion to the
+    change and a memory-mapped ScenarioStore stays mapped. An overlay on a
+    list is folded into a new list once it outgrows half the list.
+    """
+
+    def __init__(self, scenarios: Sequence[Dict] = (), source: Optional[str] = None):
+        self.source = source
+        # Shard processes for the similarity index; set before the index is first used
+        self.shards = SIMILARITY_SHARDS
+        self.version = 0
+        self._scenarios = scenarios if isinstance(scenarios, ScenarioView) else ScenarioView(scenarios)
+        self._ids = None
+        self._index = None
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str) -> "ScenarioCorpus":
+        """
+        Load a corpus file; every scenario is validated unless it is a columnar
+        corpus. Raises ValueError for invalid scenarios or duplicate ids.
+        """
+        scenarios = load_scenarios(path)
+        if not isinstance(scenarios, ScenarioStore):
+            scenarios = [validate_scenario(record) for record in scenarios]
+        view = ScenarioView(scenarios)
+        ids = [scenario_id for _, scenario_id in view.ids()]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Scenario file contains duplicate ids")
+        return cls(view, source=path)
+
+    def __len__(self) -> int:
+        return len(self._scenarios)
+
+    def __getitem__(self, index):
+        return self._scenarios[index]
+
+    def snapshot(self) -> Tuple[int, Sequence[Dict]]:
+        """The current version and the scenarios it describes; later updates don't change them"""
+        with self._lock:
+            return self.version, self._scenarios
+
+    def get(self, scenario_id) -> Optional[Dict]:
+        with self._lock:
+            position = self._positions().get(scenario_id)
+            return None if position is None else self._scenarios.at(position)
+
+    @property
+    def index(self) -> SimilarityIndex:
+        """
+        Similarity index over the corpus, built on first use (sharded if
+        ``shards`` > 1). The build doesn't hold the corpus lock; it starts
+        over if the corpus changed meanwhile.
+        """
+        if self._index is not None:
+            return self._index
+        with self._build_lock:
+            while self._index is None:
+                version, scenarios = self.version, self._scenarios
+                index = self._build_index(scenarios)
+                with self._lock:
+                    if self.version == version:
+                        self._index = index
+                        break
+                if isinstance(index, ShardedSimilarityIndex):
+                    index.close()
+            return self._index
+
+    def search(self, user_input: str, threshold: float = 0.6, top_k: int = 5):
+        index = self.index
+        if isinstance(index, ShardedSimilarityIndex):
+            # Shards apply updates in order themselves; don't serialize queries over their IPC
+            return index.search(user_input, threshold, top_k=top_k)
+        with self._lock:
+            return index.search(user_input, threshold, top_k=top_k)
+
+    def add(self, records: Iterable[Dict]) -> Dict:
+        """Validate and add scenarios, replacing any with the same id; all-or-nothing"""
+        scenarios = [validate_scenario(record) for record in records]
+        with self._lock:
+            positions = self._positions()
+            end = self._scenarios.end
+            replacements: Dict[int, Dict] = {}
+            appended: List[Dict] = []
+            added = replaced = 0
+            for scenario in scenarios:
+                position = positions.get(scenario["id"])
+                if position is None:
+                    positions[scenario["id"]] = end + len(appended)
+                    appended.append(scenario)
+                    added += 1
+                else:
+                    if position >= end:
+                        appended[position - end] = scenario
+                    else:
+                        replacements[position] = scenario
+                    replaced += 1
+                if self._index is not None:
+                    self._index.add(scenario)
+            self._commit(self._scenarios.changed(replacements, (), appended))
+            return {"added": added, "replaced": replaced, "version": self.version}
+
+    def remove(self, scenario_ids: Iterable) -> Dict:
+        """Remove scenarios by id; unknown ids are reported, not an error"""
+        scenario_ids = list(scenario_ids)
+        with self._lock:
+            positions = self._positions()
+            doomed = {scenario_id: positions[scenario_id] for scenario_id in scenario_ids if scenario_id in positions}
+            missing = [scenario_id for scenario_id in scenario_ids if scenario_id not in positions]
+            if doomed:
+                for scenario_id in doomed:
+                    del positions[scenario_id]
+                    if self._index is not None:
+                        self._index.remove(scenario_id)
+                self._commit(self._scenarios.changed(removed=doomed.values()))
+            return {"removed": len(doomed), "missing": missing, "version": self.version}
+
+    def reload(self, path: Optional[str] = None) -> Dict:
+        """
+        Re-read the source file and apply only the differences: new and
+        changed scenarios are validated and (re)indexed, vanished ones removed.
+        The corpus then follows the file's order.
+        """
+        path = path or self.source
+        if not path:
+            raise ValueError("Corpus has no source file to reload")
+        records = load_scenarios(path)
+        columnar = isinstance(records, ScenarioStore)
+
+        with self._lock:
+            positions = self._positions()
+            incoming, incoming_ids, changed = [], set(), []
+            for record in records:
+                position = positions.get(record.get("id")) if isinstance(record, dict) else None
+                current = None if position is None else self._scenarios.at(position)
+                if record != current:
+                    # Columnar files are trusted as in from_file
+                    record = record if columnar else validate_scenario(record)
+                    changed.append(record)
+                else:
+                    record = current
+                if record["id"] in incoming_ids:
+                    raise ValueError("Scenario file contains duplicate ids")
+                incoming_ids.add(record["id"])
+                if not columnar:
+                    incoming.append(record)
+            removed = [scenario_id for scenario_id in positions if scenario_id not in incoming_ids]
+
+            if changed or removed:
+                if self._index is not None:
+                    for scenario_id in removed:
+                        self._index.remove(scenario_id)
+                    for scenario in changed:
+                        self._index.add(scenario)
+                self._scenarios = ScenarioView(records if columnar else incoming)
+                self._ids = None
+                self.version += 1
+            self.source = path
+            return {"changed": len(changed), "removed": len(removed), "version": self.version}
+
+    def _build_index(self, view: ScenarioView):
+        if self.shards > 1:
+            return ShardedSimilarityIndex(view, self.shards)
+        if not isinstance(view.base, ScenarioStore):
+            return SimilarityIndex(view)
+        # Index the mapped rows by position (see SimilarityIndex), then the updates on top
+        index = SimilarityIndex(view.base)
+        removed, updated = view.changes()
+        for scenario_id in removed:
+            index.remove(scenario_id)
+        for scenario in updated:
+            index.add(scenario)
+        return index
+
+    def _positions(self) -> Dict:
+        if self._ids is None:
+            self._ids = {scenario_id: position for position, scenario_id in self._scenarios.ids()}
+        return self._ids
+
+    def _commit(self, view: ScenarioView) -> None:
+        # Swap in a new view so concurrent readers keep a consistent snapshot
+        if not isinstance(view.base, ScenarioStore) and view.overlay_size > len(view.base) // 2 + 64:
+            view = ScenarioView(list(view))
+            self._ids = None
+        self._scenarios = view
+        self.version += 1
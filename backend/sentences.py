@@ -0,0 +1,125 @@
+"""Claim (sentence) splitting with character offsets.
+
+Splits on runs of ``.``, ``!`` and ``?`` followed by whitespace (or the end
+of the text), on blank lines and before numbered list items ("1. ", "2) "
+at the start of a line), but not inside decimals ("2.5 kg/ha"), after
+common abbreviations ("e.g.", "approx.") or before a lowercase
+continuation. List markers are not part of the claim. Claims are yielded
+lazily as (text, start, end) with ``text == source[start:end]``; only the
+claim strings themselves are allocated, so long reports split in a single
+linear pass.
+"""
+
+import re
+from typing import Iterator, NamedTuple, Optional
+
+# Closing punctuation that may sit between a terminator and the next sentence
+_CLOSERS = '"\')]”’'
+
+# A terminator run followed by whitespace or the end (so never inside "2.5"),
+# a blank line (paragraph break), or a line break before a numbered list item
+_TERMINATOR = re.compile(r'[.!?]+(?=[%s]*(?:\s|$))|\n[ \t\r]*\n|\n(?=[ \t]*\d+[.)]\s)' % re.escape(_CLOSERS))
+
+# A numbered list marker, checked at the start of a line
+_LIST_MARKER = re.compile(r'\d+[.)](?:\s+|$)')
+
+# Words (lower-cased, inner dots kept) whose trailing "." is not a sentence end
+ABBREVIATIONS = frozenset({
+    "e.g", "i.e", "etc", "vs", "cf", "approx", "ca", "al", "fig", "figs", "eq",
+    "dr", "mr", "mrs", "ms", "prof", "st", "avg", "est", "temp", "incl", "resp",
+    "wt", "vol", "sp", "spp", "var", "cv", "jan", "feb", "mar", "apr",
+    "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec"
+})
+
+# Longest abbreviation worth looking back for
+_MAX_ABBREVIATION = max(len(word) for word in ABBREVIATIONS)
+
+
+class Claim(NamedTuple):
+    text: str
+    start: int
+    end: int
+
+
+def iter_claims(text: str) -> Iterator[Claim]:
+    """Lazily yield the claims of ``text`` with their offsets"""
+    start = 0
+    for match in _TERMINATOR.finditer(text):
+        if not _is_boundary(text, match.start(), match.end()):
+            continue
+        claim = _span(text, start, match.start())
+        if claim is not None:
+            yield claim
+        start = match.end()
+        while start < len(text) and text[start] in _CLOSERS:
+            start += 1
+
+    claim = _span(text, start, len(text))
+    if claim is not None:
+        yield claim
+
+
+def split_claims(text: str) -> list:
+    """All claim strings of ``text``"""
+    return [claim.text for claim in iter_claims(text)]
+
+
+def _span(text: str, start: int, end: int) -> Optional[Claim]:
+    # Trim whitespace by moving the bounds rather than slicing twice
+    line_start = start == 0 or text[start - 1] == '\n'
+    while start < end and text[start].isspace():
+        line_start = line_start or text[start] == '\n'
+        start += 1
+    if line_start:
+        marker = _LIST_MARKER.match(text, start, end)
+        if marker is not None:
+            start = marker.end()
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start == end:
+        return None
+    return Claim(text[start:end], start, end)
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    """Whether the terminator at text[start:end] ends a claim"""
+    if text[start] == '\n':
+        return True
+
+    # Skip closing quotes/brackets; a sentence end needs whitespace or the end after them
+    following = end
+    while following < len(text) and text[following] in _CLOSERS:
+        following += 1
+    if following == len(text):
+        return True
+    if not text[following].isspace():
+        return False  # decimals, "kg/ha.", URLs, "e.g" inner dots
+    if text[start:end] != '.':
+        return True
+
+    # "1." opening a line is a list marker, not a sentence
+    digits = start
+    while digits > 0 and text[digits - 1].isdigit():
+        digits -= 1
+    if digits < start:
+        indent = digits
+        while indent > 0 and text[indent - 1] in ' \t':
+            indent -= 1
+        if indent == 0 or text[indent - 1] == '\n':
+            return False
+
+    # Word before the dot, keeping inner dots ("e.g"), bounded look-back
+    word_start = start
+    while (word_start > 0 and start - word_start <= _MAX_ABBREVIATION
+           and (text[word_start - 1].isalpha() or text[word_start - 1] == '.')):
+        word_start -= 1
+    if text[word_start:start].lower() in ABBREVIATIONS:
+        return False
+
+    # A lowercase next word continues the sentence ("approx. three", "etc. and")
+    following += 1
+    while following < len(text) and text[following].isspace():
+        following += 1
+    if following == len(text):
+        return True
+    return not text[following].islower()
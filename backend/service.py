@@ -0,0 +1,447 @@
+"""Request handling shared by the Flask (app.py) and ASGI (asgi.py) servers.
+
+Functions here take plain values and return JSON-ready dicts, so they can
+run in a worker process as well as inside a request handler.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # optional: responses fall back to JSON
+    msgpack = None
+
+from demo_data import DEMO_EXAMPLES, search_similar_demos
+from incremental import remember, verify_edits
+from instrumentation import stage
+from pipeline import PIPELINE_MODES, get_pipeline
+from singleflight import SingleFlight
+from aggregate import RunningAggregate
+from verifier import SCORING_MODES, build_result, iter_verify_claims, verify_explanation
+
+
+def scoring_options(params) -> Dict:
+    """Read optional scoring/seed request parameters, raising ValueError if invalid"""
+    options = {}
+    scoring = params.get('scoring')
+    seed = params.get('seed')
+    if scoring is not None:
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"scoring must be one of {', '.join(SCORING_MODES)}")
+        options['scoring'] = scoring
+    if seed is not None:
+        if isinstance(seed, bool) or not isinstance(seed, (int, str)):
+            raise ValueError("seed must be an integer or string")
+        options['seed'] = seed
+    return options
+
+
+def similarity_fields(similar_matches) -> Dict:
+    """Response fields describing the closest known scenario, if any"""
+    fields = {}
+    if similar_matches:
+        # Use the best matching demo
+        best_match = similar_matches[0]
+        demo = best_match["demo"]
+
+        # Add similarity information and recommendations
+        fields["similarity_match"] = {
+            "found": True,
+            "similarity_score": round(best_match["similarity"] * 100, 1),
+            "matched_scenario": demo["title"],
+            "category": demo.get("category", "general"),
+            "recommendation": f"Your input is {round(best_match['similarity'] * 100, 1)}% similar to a known scenario. Consider the following approach..."
+        }
+
+        # Add scenario-specific metrics
+        fields["enhanced_metrics"] = {
+            "confidence_score": demo.get("confidence_score", 50),
+            "reasoning_quality": demo.get("reasoning_quality", "medium"),
+            "data_sources_count": len(demo.get("data_sources", [])),
+            "expected_outcome": demo.get("expected_status", "questionable")
+        }
+    else:
+        # Standard verification for novel input
+        fields["similarity_match"] = {
+            "found": False,
+            "message": "This appears to be a novel scenario. Analysis is based on general principles."
+        }
+    return fields
+
+
+def pipeline_option(params) -> Dict:
+    """Read the optional pipeline request parameter ("fast" or "nlp"), raising ValueError if invalid"""
+    mode = params.get('pipeline')
+    if mode is None:
+        return {}
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"pipeline must be one of {', '.join(PIPELINE_MODES)}")
+    return {'pipeline': mode}
+
+
+def verify_with_context(explanation: str, domain: str = 'agriculture', pipeline: Optional[str] = None,
+                        **options) -> Dict:
+    """
+    Verify an explanation and attach the closest known scenario, as served by /api/verify.
+    With ``pipeline`` ("fast" or "nlp"), verification also extracts entities and checks causal chains.
+    """
+    # Check for similar demos first (fuzzy matching)
+    with stage("search_similar"):
+        similar_matches = search_similar_demos(explanation, threshold=0.5)
+
+    # Run verification
+    with stage("verify"):
+        if pipeline:
+            result = get_pipeline(pipeline).verify(explanation, domain, **options)
+        else:
+            result = verify_explanation(explanation, domain, **options)
+
+    result.update(similarity_fields(similar_matches))
+    return result
+
+
+def _similarity_context(explanation: str) -> Dict:
+    with stage("search_similar"):
+        return similarity_fields(search_similar_demos(explanation, threshold=0.5))
+
+
+def verify_incremental(explanation: Optional[str] = None, domain: str = 'agriculture', handle: Optional[str] = None,
+                       edits=None, refresh_similarity: bool = False, **options) -> Dict:
+    """
+    Body of /api/verify/incremental. Without a ``handle``, verify ``explanation``
+    in full like /api/verify; with one, re-verify only the claims touched by
+    ``edits``. Either way the result carries a ``handle`` for the next edit.
+    The similarity match is carried over from the full verification unless
+    ``refresh_similarity`` is set, as it is the costliest step on long texts.
+    Raises UnknownHandle or ValueError.
+    """
+    if handle is None:
+        result = verify_with_context(explanation, domain, **options)
+        context = {key: result[key] for key in ("similarity_match", "enhanced_metrics") if key in result}
+        result["handle"] = remember(result, options.get('scoring'), options.get('seed'), context)
+        return result
+
+    result, handle, context = verify_edits(handle, edits, _similarity_context if refresh_similarity else None)
+    result.update(context)
+    result["handle"] = handle
+    return result
+
+
+def live_events(explanation: str, domain: str = 'agriculture', **options) -> Iterator[Tuple[str, Dict]]:
+    """
+    Verify an explanation claim by claim as (event, data) pairs for /api/verify/live:
+    "start" with the empty aggregate, "claim" for every verified claim, with the metric and distribution values that
+    changed ("delta"), then "done" with the summary, recommendations and similarity
+    match (claims aren't repeated).
+    """
+    verified = []
+    aggregate = RunningAggregate(explanation).result()
+    # Deltas apply on top of the aggregate of no claims
+    yield "start", dict(aggregate, domain=domain)
+
+    for claim, current in iter_verify_claims(explanation, domain, **options):
+        yield "claim", {"index": len(verified), "claim": claim, "delta": aggregate_delta(aggregate, current)}
+        verified.append(claim)
+        aggregate = current
+
+    result = build_result(explanation, domain, verified, aggregate)
+    result.update(_similarity_context(explanation))
+    done = {key: value for key, value in result.items() if key not in ("original_text", "claims", "issues")}
+    done["chart_data"] = {key: value for key, value in result["chart_data"].items() if key != "claim_details"}
+    done["claim_count"] = len(verified)
+    yield "done", done
+
+
+def aggregate_delta(previous: Dict, current: Dict) -> Dict:
+    """The parts of an aggregate_claims() entry that differ from ``previous``"""
+    delta = {}
+    for key, value in current.items():
+        if isinstance(value, dict):
+            changed = {name: number for name, number in value.items() if previous[key].get(name) != number}
+            if changed:
+                delta[key] = changed
+        elif value != previous[key]:
+            delta[key] = value
+    return delta
+
+
+def sse_event(event: str, data) -> str:
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+# Concurrent identical /api/verify requests share one verify_with_context call
+VERIFY_FLIGHTS = SingleFlight('verify')
+
+
+def verify_flight_key(explanation: str, domain: str, options: Dict) -> tuple:
+    """Requests with equal keys produce identical verify_with_context results"""
+    return (explanation, domain, options.get('scoring'), options.get('seed'), options.get('pipeline'))
+
+
+def verify_coalesced(explanation: str, domain: str = 'agriculture', **options) -> Dict:
+    """``verify_with_context``, joining an identical call already running in another thread"""
+    key = verify_flight_key(explanation, domain, options)
+    return VERIFY_FLIGHTS.do(key, verify_with_context, explanation, domain, **options)
+
+
+# Response profiles for /api/verify: minimal has just the verdict, standard drops
+# the echoed text and refers to claims by index, full is the original shape
+RESPONSE_PROFILES = ("minimal", "standard", "full")
+
+DEFAULT_RESPONSE_PROFILE = os.environ.get('DEFAULT_RESPONSE_PROFILE', 'full')
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+
+def response_profile(params) -> str:
+    """Read the optional profile request parameter, raising ValueError if invalid"""
+    profile = params.get('profile') or DEFAULT_RESPONSE_PROFILE
+    if profile not in RESPONSE_PROFILES:
+        raise ValueError(f"profile must be one of {', '.join(RESPONSE_PROFILES)}")
+    return profile
+
+
+def apply_profile(result: Dict, profile: str = 'full') -> Dict:
+    """
+    Shape a verification result for ``profile``. ``standard`` lists issues as
+    indices into ``claims`` and leaves out ``original_text`` and
+    ``chart_data.claim_details``, which only repeat what ``claims`` holds.
+    """
+    if profile == 'full':
+        return result
+    if profile == 'minimal':
+        return {key: result[key] for key in ("domain", "overall_status", "metrics", "handle") if key in result}
+
+    shaped = {key: value for key, value in result.items() if key != "original_text"}
+    shaped["issues"] = [i for i, claim in enumerate(result.get("claims", [])) if claim["status"] != "valid"]
+    if "chart_data" in result:
+        shaped["chart_data"] = {key: value for key, value in result["chart_data"].items() if key != "claim_details"}
+    return shaped
+
+
+def wants_msgpack(params, headers) -> bool:
+    """
+    Whether to answer in MessagePack: ?format=msgpack, or an Accept header
+    naming it when msgpack is installed. Raises ValueError if it can't be served.
+    """
+    fmt = params.get('format')
+    if fmt not in (None, '', 'json', 'msgpack'):
+        raise ValueError("format must be json or msgpack")
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise ValueError("msgpack encoding is not available on this server")
+        return True
+    return fmt != 'json' and msgpack is not None and MSGPACK_MIMETYPE in headers.get('Accept', '')
+
+
+def pack_msgpack(payload) -> bytes:
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def search_similar_response(user_input: str, threshold: float = 0.6) -> Dict:
+    """Body of the /api/search-similar response"""
+    matches = search_similar_demos(user_input, threshold)
+
+    if matches:
+        return {
+            "success": True,
+            "matches_found": len(matches),
+            "matches": matches
+        }
+    return {
+        "success": True,
+        "matches_found": 0,
+        "message": "No similar scenarios found. This appears to be a novel case."
+    }
+
+
+# Scenario fields clients may request via /api/examples?fields=
+EXAMPLE_FIELDS = ("id", "title", "domain", "category", "explanation", "expected_status",
+                  "confidence_score", "reasoning_quality", "data_sources")
+
+# Cache-Control max-age for /api/examples, in seconds
+EXAMPLES_MAX_AGE = int(os.environ.get('EXAMPLES_MAX_AGE', 300))
+
+# Bytes of serialized and compressed /api/examples payloads kept in memory
+EXAMPLES_CACHE_BYTES = int(os.environ.get('EXAMPLES_CACHE_BYTES', 64 * 1024 * 1024))
+
+# Largest page (limit) whose payload is cached; other slices are built per request
+EXAMPLES_CACHE_PAGE = int(os.environ.get('EXAMPLES_CACHE_PAGE', 100))
+
+
+class CachedPayload:
+    """A serialized JSON body plus its ETag and lazily built compressed variants"""
+
+    def __init__(self, body: bytes, total: int):
+        self.body = body
+        self.total = total
+        self.etag = 'W/"%s"' % hashlib.sha256(body).hexdigest()[:32]
+        # Bytes the ExamplesCache counts for this payload; 0 when it isn't cached
+        self.cached_size = 0
+        self._encoded = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self._encoded.values())
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        if encoding not in self._encoded:
+            if encoding == 'br':
+                self._encoded[encoding] = brotli.compress(self.body)
+            else:
+                self._encoded[encoding] = gzip.compress(self.body, compresslevel=6)
+        return self._encoded[encoding]
+
+
+class ExamplesCache:
+    """
+    Serialized /api/examples payloads per corpus version, bounded by
+    ``max_bytes`` (bodies plus compressed variants). Only the full listing
+    and pages of up to EXAMPLES_CACHE_PAGE scenarios are kept; concurrent
+    misses for the same payload or encoding build it once.
+    """
+
+    def __init__(self, max_bytes: int = EXAMPLES_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._payloads: "OrderedDict[tuple, CachedPayload]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight('examples')
+
+    def get(self, offset: int = 0, limit: Optional[int] = None,
+            fields: Optional[Tuple[str, ...]] = None) -> CachedPayload:
+        # One snapshot, so the ETag always describes the version's own data
+        version, scenarios = DEMO_EXAMPLES.snapshot()
+        key = (version, offset, limit, fields)
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+                return payload
+
+        built = self._flights.do(key, self._build, key, scenarios)
+        with self._lock:
+            # Joiners get a copy; serve the cached object so its encodings are shared
+            return self._payloads.get(key) or built
+
+    def encoded(self, payload: CachedPayload, encoding: Optional[str]) -> bytes:
+        """``payload`` in ``encoding``, compressing it once however many requests ask at the same time"""
+        if encoding is None or encoding in payload._encoded:
+            return payload.encoded(encoding)
+        data = self._flights.do((payload.etag, encoding), payload.encoded, encoding)
+        with self._lock:
+            if payload.cached_size:
+                self.size += payload.size - payload.cached_size
+                payload.cached_size = payload.size
+                self._evict()
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            for payload in self._payloads.values():
+                payload.cached_size = 0
+            self._payloads.clear()
+            self.size = 0
+
+    def _build(self, key: tuple, scenarios) -> CachedPayload:
+        _, offset, limit, fields = key
+        examples = scenarios[offset:offset + limit if limit is not None else None]
+        if fields:
+            examples = [{field: example[field] for field in fields if field in example} for example in examples]
+        body = json.dumps(examples, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        payload = CachedPayload(body, len(scenarios))
+
+        full = offset == 0 and limit is None and fields is None
+        if (full or (limit is not None and limit <= EXAMPLES_CACHE_PAGE)) and payload.size <= self.max_bytes:
+            with self._lock:
+                if key not in self._payloads:
+                    self._payloads[key] = payload
+                    payload.cached_size = payload.size
+                    self.size += payload.cached_size
+                    self._evict()
+        return payload
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes and self._payloads:
+            _, payload = self._payloads.popitem(last=False)
+            self.size -= payload.cached_size
+            payload.cached_size = 0
+
+
+EXAMPLES_CACHE = ExamplesCache()
+
+
+def parse_examples_query(params) -> Tuple[int, Optional[int], Optional[Tuple[str, ...]]]:
+    """Read offset/limit/fields query parameters, raising ValueError if invalid"""
+    try:
+        offset = int(params.get('offset', 0))
+        limit = int(params['limit']) if params.get('limit') not in (None, '') else None
+    except ValueError:
+        raise ValueError("offset and limit must be integers")
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset and limit must not be negative")
+
+    fields = None
+    if params.get('fields'):
+        fields = tuple(field.strip() for field in params['fields'].split(',') if field.strip())
+        unknown = [field for field in fields if field not in EXAMPLE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return offset, limit, fields
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, or None for identity"""
+    accepted = set()
+    for token in (accept_encoding or '').split(','):
+        name, _, params = token.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def examples_response(params, headers) -> Tuple[int, bytes, Dict[str, str]]:
+    """
+    Build the /api/examples response as (status, body, headers), honouring
+    If-None-Match and Accept-Encoding. Raises ValueError for bad parameters.
+    """
+    payload = EXAMPLES_CACHE.get(*parse_examples_query(params))
+    response_headers = {
+        "ETag": payload.etag,
+        "Cache-Control": f"public, max-age={EXAMPLES_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+        "X-Total-Count": str(payload.total),
+        "Access-Control-Expose-Headers": "ETag, X-Total-Count"
+    }
+
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        # Weak comparison: W/"x" and "x" are the same validator
+        if '*' in tags or payload.etag in tags or payload.etag[2:] in tags:
+            return 304, b'', response_headers
+
+    encoding = negotiate_encoding(headers.get('Accept-Encoding', ''))
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+    response_headers["Content-Type"] = "application/json"
+    return 200, EXAMPLES_CACHE.encoded(payload, encoding), response_headers
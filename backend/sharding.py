@@ -0,0 +1,151 @@
+"""Similarity search over a corpus split across worker processes.
+
+Each shard is a single-process executor that builds a SimilarityIndex of
+its scenarios once, at start-up, and keeps it in memory. A query is sent
+to every shard at once, so the shards score in parallel, and their top-k
+lists are merged. Scenarios are assigned to shards by a hash of their id,
+which routes adds, replacements and removals to the shard holding them.
+Set SIMILARITY_SHARDS to the number of shards (0 or 1: search in-process).
+"""
+
+import math
+import os
+import threading
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from similarity import SimilarityIndex, _as_matches
+
+# Worker processes the scenario corpus is split across; 0 or 1 disables sharding
+SIMILARITY_SHARDS = int(os.environ.get('SIMILARITY_SHARDS', 0))
+
+# The shard's index in a worker, with the sequence number of every scenario id
+_shard_index: Optional[SimilarityIndex] = None
+_shard_seqs: Dict = {}
+
+
+def _shard_fields(demo: Dict) -> Dict:
+    # Workers only need what the similarity score reads
+    return {"id": demo["id"], "title": demo["title"], "explanation": demo["explanation"]}
+
+
+def _init_shard(items: List[Tuple[int, Dict]], options: Dict) -> None:
+    global _shard_index
+    _shard_index = SimilarityIndex((), **options)
+    for seq, demo in items:
+        _shard_add(seq, demo)
+
+
+def _shard_add(seq: int, demo: Dict) -> None:
+    _shard_index.add(demo)
+    _shard_seqs[demo["id"]] = seq
+
+
+def _shard_remove(demo_id) -> None:
+    _shard_index.remove(demo_id)
+    _shard_seqs.pop(demo_id, None)
+
+
+def _shard_search(user_input: str, threshold: float, top_k: int) -> List[Tuple[float, int]]:
+    matches = _shard_index.search(user_input, threshold, top_k=top_k) or []
+    return [(match["similarity"], _shard_seqs[match["demo"]["id"]]) for match in matches]
+
+
+class ShardedSimilarityIndex:
+    """SimilarityIndex with the same interface, partitioned over persistent worker processes.
+
+    Every scenario gets an increasing sequence number; shards index their
+    scenarios in that order, so merging by (score, sequence number) breaks
+    ties towards earlier scenarios just as a single index does. Updates are
+    queued to the owning shard without waiting; a shard runs its tasks in
+    order, so later searches see them. ``rescore_limit`` is split across
+    shards, keeping the exact scoring work per query about the same as
+    for one index.
+    """
+
+    def __init__(self, demos: Iterable[Dict] = (), shards: Optional[int] = None, rescore_limit: int = 64,
+                 **options):
+        self.shards = max(1, shards or SIMILARITY_SHARDS or os.cpu_count() or 1)
+        self._options = dict(options, rescore_limit=max(1, math.ceil(rescore_limit / self.shards)))
+        self._demos: Dict[int, Dict] = {}
+        self._seqs_by_id: Dict = {}
+        self._next_seq = 0
+        self._lock = threading.RLock()
+
+        for demo in demos:
+            self._register(demo)
+        self._executors = [self._start(shard) for shard in range(self.shards)]
+
+    def __len__(self) -> int:
+        return len(self._demos)
+
+    def shard_of(self, demo_id) -> int:
+        return zlib.crc32(repr(demo_id).encode('utf-8')) % self.shards
+
+    def add(self, demo: Dict) -> None:
+        """Index a scenario; an existing scenario with the same id is replaced."""
+        with self._lock:
+            seq = self._register(demo)
+            self._submit(self.shard_of(demo["id"]), _shard_add, seq, _shard_fields(demo))
+
+    def remove(self, demo_id) -> bool:
+        """Drop a scenario from the index. Returns False if it was not indexed."""
+        with self._lock:
+            seq = self._seqs_by_id.pop(demo_id, None)
+            if seq is None:
+                return False
+            del self._demos[seq]
+            self._submit(self.shard_of(demo_id), _shard_remove, demo_id)
+            return True
+
+    def search(self, user_input: str, threshold: float = 0.6, top_k: int = 5) -> Optional[List[Dict]]:
+        """Find the top ``top_k`` scenarios scoring at least ``threshold``, searching all shards at once."""
+        futures = [self._submit(shard, _shard_search, user_input, threshold, top_k) for shard in range(self.shards)]
+        hits = []
+        for shard, future in enumerate(futures):
+            try:
+                hits.extend(future.result())
+            except BrokenProcessPool:
+                # The worker died and took its index along; rebuild it and ask again
+                self._restart(shard)
+                hits.extend(self._submit(shard, _shard_search, user_input, threshold, top_k).result())
+
+        hits.sort(key=lambda hit: (-hit[0], hit[1]))
+        # A scenario removed while the query ran is skipped
+        matches = [(score, self._demos.get(seq)) for score, seq in hits]
+        return _as_matches([match for match in matches if match[1] is not None][:top_k])
+
+    def close(self) -> None:
+        """Stop the shard processes."""
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _register(self, demo: Dict) -> int:
+        previous = self._seqs_by_id.get(demo["id"])
+        if previous is not None:
+            del self._demos[previous]
+        seq = self._next_seq
+        self._next_seq += 1
+        self._demos[seq] = demo
+        self._seqs_by_id[demo["id"]] = seq
+        return seq
+
+    def _start(self, shard: int) -> ProcessPoolExecutor:
+        items = [(seq, _shard_fields(demo)) for seq, demo in self._demos.items()
+                 if self.shard_of(demo["id"]) == shard]
+        return ProcessPoolExecutor(max_workers=1, initializer=_init_shard, initargs=(items, self._options))
+
+    def _submit(self, shard: int, fn, *args) -> Future:
+        try:
+            return self._executors[shard].submit(fn, *args)
+        except BrokenProcessPool:
+            # A restarted shard is built from the current scenarios, including this update
+            return self._restart(shard).submit(fn, *args)
+
+    def _restart(self, shard: int) -> ProcessPoolExecutor:
+        with self._lock:
+            self._executors[shard].shutdown(wait=False, cancel_futures=True)
+            self._executors[shard] = self._start(shard)
+            return self._executors[shard]
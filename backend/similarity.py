@@ -0,0 +1,317 @@
+"""Character n-gram index for fast similarity search over demo scenarios."""
+
+import difflib
+import heapq
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from corpus import ScenarioStore
+from instrumentation import count
+
+# Keywords that earn a bonus when shared by the user input and a scenario
+KEYWORDS = ["irrigation", "water", "pest", "fertilizer", "harvest", "soil", "disease",
+            "spray", "plant", "crop", "yield"]
+
+NGRAM_SIZE = 3
+
+# N-grams in more than this fraction of fields are dropped when the index is built
+MAX_DF_FRACTION = 0.25
+
+# Postings a query may visit per rescored candidate
+POSTINGS_PER_CANDIDATE = 256
+
+
+def char_ngrams(text: str, n: int = NGRAM_SIZE) -> Counter:
+    """Count overlapping character n-grams of an already lower-cased text."""
+    return Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def keyword_score(user_lower: str, explanation_lower: str) -> float:
+    """Fraction of domain keywords present in both texts."""
+    keyword_matches = sum(1 for kw in KEYWORDS if kw in user_lower and kw in explanation_lower)
+    return keyword_matches / len(KEYWORDS)
+
+
+def score_demo(user_lower: str, demo: Dict) -> float:
+    """Exact similarity score between lower-cased user input and a demo scenario."""
+    explanation_lower = demo["explanation"].lower()
+    title_lower = demo["title"].lower()
+
+    explanation_ratio = difflib.SequenceMatcher(None, user_lower, explanation_lower).ratio()
+    title_ratio = difflib.SequenceMatcher(None, user_lower, title_lower).ratio()
+
+    return max(explanation_ratio, title_ratio) + (keyword_score(user_lower, explanation_lower) * 0.3)
+
+
+# Lower-cased explanation and title with their character counts
+Fields = Tuple[str, str, Counter, Counter]
+
+
+def demo_fields(demo: Dict) -> Fields:
+    """Precomputed inputs for ``top_matches``."""
+    explanation_lower = demo["explanation"].lower()
+    title_lower = demo["title"].lower()
+    return explanation_lower, title_lower, Counter(explanation_lower), Counter(title_lower)
+
+
+def _length_bound(user_len: int, field_len: int) -> float:
+    # SequenceMatcher.real_quick_ratio(): matches can't exceed the shorter text
+    total = user_len + field_len
+    return 2.0 * min(user_len, field_len) / total if total else 1.0
+
+
+def _char_bound(user_counts: Counter, user_len: int, field_counts: Counter, field_len: int) -> float:
+    # SequenceMatcher.quick_ratio(): matches can't exceed the shared character multiset
+    total = user_len + field_len
+    if not total:
+        return 1.0
+    matches = sum(min(n, field_counts[ch]) for ch, n in user_counts.items() if ch in field_counts)
+    return 2.0 * matches / total
+
+
+def top_matches(user_lower: str, candidates: Iterable[Tuple[Dict, Fields]],
+                threshold: float = 0.6, top_k: int = 5) -> List[Tuple[float, Dict]]:
+    """
+    The ``top_k`` best (score, demo) pairs scoring at least ``threshold``,
+    best first, with ties going to the earlier candidate. Same result as
+    scoring every candidate with ``score_demo``, but the exact ratio() calls
+    only run for candidates whose cheap upper bounds (text lengths, then
+    character counts, as in real_quick_ratio/quick_ratio) can still reach
+    the threshold and the current k-th best. Candidates are scored in order
+    of decreasing bound, so the scan stops at the first one that can't.
+    """
+    if top_k < 1:
+        return []
+    user_len = len(user_lower)
+    user_counts = Counter(user_lower)
+
+    bounded = []
+    for order, (demo, fields) in enumerate(candidates):
+        explanation_lower, title_lower, explanation_counts, title_counts = fields
+        bonus = keyword_score(user_lower, explanation_lower) * 0.3
+        if max(_length_bound(user_len, len(explanation_lower)),
+               _length_bound(user_len, len(title_lower))) + bonus < threshold:
+            continue
+        explanation_bound = _char_bound(user_counts, user_len, explanation_counts, len(explanation_lower))
+        title_bound = _char_bound(user_counts, user_len, title_counts, len(title_lower))
+        bound = max(explanation_bound, title_bound) + bonus
+        if bound >= threshold:
+            bounded.append((bound, order, demo, fields, bonus, explanation_bound, title_bound))
+    bounded.sort(key=lambda entry: (-entry[0], entry[1]))
+
+    # Min-heap of (score, -order, demo): its root is the k-th best, later candidates losing ties
+    heap: List[Tuple[float, int, Dict]] = []
+    for bound, order, demo, fields, bonus, explanation_bound, title_bound in bounded:
+        if len(heap) >= top_k and bound < heap[0][0]:
+            break
+        explanation_lower, title_lower = fields[0], fields[1]
+
+        # Exact ratio for the more promising field first; the other only if it could win
+        if explanation_bound >= title_bound:
+            best = difflib.SequenceMatcher(None, user_lower, explanation_lower).ratio()
+            if title_bound > best:
+                best = max(best, difflib.SequenceMatcher(None, user_lower, title_lower).ratio())
+        else:
+            best = difflib.SequenceMatcher(None, user_lower, title_lower).ratio()
+            if explanation_bound > best:
+                best = max(difflib.SequenceMatcher(None, user_lower, explanation_lower).ratio(), best)
+        score = best + bonus
+
+        if score < threshold:
+            continue
+        if len(heap) < top_k:
+            heapq.heappush(heap, (score, -order, demo))
+        elif (score, -order) > heap[0][:2]:
+            heapq.heapreplace(heap, (score, -order, demo))
+
+    heap.sort(key=lambda entry: (-entry[0], -entry[1]))
+    return [(score, demo) for score, _, demo in heap]
+
+
+def search_demos(user_input: str, demos: Iterable[Dict], threshold: float = 0.6,
+                 top_k: int = 5) -> Optional[List[Dict]]:
+    """Bounded linear scan over scenarios, for when no SimilarityIndex is built."""
+    matches = top_matches(user_input.lower(), ((demo, demo_fields(demo)) for demo in demos), threshold, top_k)
+    return _as_matches(matches)
+
+
+def _as_matches(matches: List[Tuple[float, Dict]]) -> Optional[List[Dict]]:
+    if not matches:
+        return None
+    return [{"demo": demo, "similarity": score, "match_type": "similar_scenario"} for score, demo in matches]
+
+
+class SimilarityIndex:
+    """Inverted character n-gram index with exact rescoring of top candidates.
+
+    Each scenario's title and explanation are indexed as separate fields.
+    A query is first ranked against the postings with TF-IDF weights, and
+    only the best ``rescore_limit`` scenarios are scored exactly with
+    ``score_demo``. N-grams common to more than MAX_DF_FRACTION of the
+    fields at build time are not indexed, and a query visits at most
+    ``max_postings`` postings (by default POSTINGS_PER_CANDIDATE per
+    rescored candidate), rarest n-grams first, so per-query cost stays
+    flat as the corpus grows. Results are therefore approximate: a
+    scenario above the threshold that doesn't rank among the candidates
+    is missed, even when it would be the best match.
+    With ``bounded`` (the default), rescoring goes through ``top_matches``
+    and skips candidates that provably can't make the top ``top_k``.
+
+    Built from a ScenarioStore, the index keeps only row positions and its
+    postings: candidates' titles and explanations are read from the store
+    per query, so processes sharing the mapped file don't each hold a copy
+    of the corpus. Scenarios added later are kept as given.
+    """
+
+    def __init__(self, demos: Iterable[Dict] = (), ngram_size: int = NGRAM_SIZE,
+                 rescore_limit: int = 64, max_postings: Optional[int] = None, bounded: bool = True):
+        self.ngram_size = ngram_size
+        self.rescore_limit = rescore_limit
+        self.max_postings = max_postings or rescore_limit * POSTINGS_PER_CANDIDATE
+        self.bounded = bounded
+        self._fields: Dict[int, Fields] = {}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_grams: Dict[int, List[str]] = {}
+        # A scenario dict, or the scenario's position in self._store
+        self._demos: Dict[int, Union[Dict, int]] = {}
+        self._keys_by_id: Dict = {}
+        self._next_key = 0
+        self._stopgrams = set()
+        self._store = demos if isinstance(demos, ScenarioStore) else None
+        if self._store is not None:
+            for position in range(len(self._store)):
+                self._add(self._store[position], position)
+        else:
+            for demo in demos:
+                self.add(demo)
+        self._drop_common_grams()
+
+    def __len__(self) -> int:
+        return len(self._demos)
+
+    def add(self, demo: Dict) -> None:
+        """Index a scenario; an existing scenario with the same id is replaced."""
+        self._add(demo, demo)
+
+    def _add(self, demo: Dict, ref: Union[Dict, int]) -> None:
+        if demo.get("id") in self._keys_by_id:
+            self.remove(demo["id"])
+
+        key = self._next_key
+        self._next_key += 1
+        self._demos[key] = ref
+        if ref is demo:
+            self._fields[key] = demo_fields(demo)
+        self._keys_by_id[demo.get("id")] = key
+
+        grams = []
+        # Field slots: 2 * key for the explanation, 2 * key + 1 for the title
+        for slot, text in ((2 * key, demo["explanation"]), (2 * key + 1, demo["title"])):
+            counts = char_ngrams(text.lower(), self.ngram_size)
+            weights = {gram: 1 + math.log(tf) for gram, tf in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for gram, weight in weights.items():
+                if gram not in self._stopgrams:
+                    self._postings.setdefault(gram, {})[slot] = weight / norm
+            grams.extend(weights)
+        self._doc_grams[key] = grams
+
+    def remove(self, demo_id) -> bool:
+        """Drop a scenario from the index. Returns False if it was not indexed."""
+        key = self._keys_by_id.pop(demo_id, None)
+        if key is None:
+            return False
+
+        for gram in self._doc_grams.pop(key):
+            postings = self._postings.get(gram)
+            if postings is None:
+                continue
+            postings.pop(2 * key, None)
+            postings.pop(2 * key + 1, None)
+            if not postings:
+                del self._postings[gram]
+        del self._demos[key]
+        self._fields.pop(key, None)
+        return True
+
+    def _drop_common_grams(self) -> None:
+        # Too common to tell candidates apart, and the most expensive to visit
+        if len(self._demos) <= self.rescore_limit:
+            return
+        limit = MAX_DF_FRACTION * 2 * len(self._demos)
+        for gram in [gram for gram, postings in self._postings.items() if len(postings) > limit]:
+            del self._postings[gram]
+            self._stopgrams.add(gram)
+
+    def _demo(self, key: int) -> Dict:
+        ref = self._demos[key]
+        return self._store[ref] if isinstance(ref, int) else ref
+
+    def _fields_of(self, key: int) -> Fields:
+        fields = self._fields.get(key)
+        if fields is None:
+            position = self._demos[key]
+            fields = demo_fields({"explanation": self._store.text("explanation", position),
+                                  "title": self._store.text("title", position)})
+        return fields
+
+    def candidates(self, user_lower: str) -> List[int]:
+        """Return keys of the most promising scenarios, in insertion order."""
+        if len(self._demos) <= self.rescore_limit:
+            return sorted(self._demos)
+
+        query = char_ngrams(user_lower, self.ngram_size)
+        terms = [(len(self._postings[g]), g, tf) for g, tf in query.items() if g in self._postings]
+        if not terms:
+            return []
+
+        # Rarest n-grams first; stop once the postings budget is spent
+        terms.sort()
+        total_slots = 2 * len(self._demos)
+        scores: Dict[int, float] = {}
+        visited = 0
+        for df, gram, tf in terms:
+            if visited and visited + df > self.max_postings:
+                break
+            weight = (1 + math.log(tf)) * math.log(1 + total_slots / df)
+            for slot, doc_weight in self._postings[gram].items():
+                scores[slot] = scores.get(slot, 0.0) + weight * doc_weight
+            visited += df
+
+        # A scenario ranks by its better-matching field
+        best_by_key: Dict[int, float] = {}
+        for slot, score in scores.items():
+            key = slot >> 1
+            if score > best_by_key.get(key, 0.0):
+                best_by_key[key] = score
+
+        return sorted(heapq.nlargest(self.rescore_limit, best_by_key, key=best_by_key.get))
+
+    def search(self, user_input: str, threshold: float = 0.6, top_k: int = 5) -> Optional[List[Dict]]:
+        """Find the top ``top_k`` scenarios scoring at least ``threshold``."""
+        user_lower = user_input.lower()
+        keys = self.candidates(user_lower)
+        if not keys and len(user_lower) < self.ngram_size:
+            # Too short to produce n-grams; fall back to scoring everything
+            keys = sorted(self._demos)
+        count("similarity_candidates", len(keys))
+
+        if self.bounded:
+            candidates = ((key, self._fields_of(key)) for key in keys)
+            matches = top_matches(user_lower, candidates, threshold, top_k)
+            return _as_matches([(score, self._demo(key)) for score, key in matches])
+
+        matches = []
+        for key in keys:
+            demo = self._demo(key)
+            overall_score = score_demo(user_lower, demo)
+            if overall_score >= threshold:
+                matches.append({
+                    "demo": demo,
+                    "similarity": overall_score,
+                    "match_type": "similar_scenario"
+                })
+
+        matches.sort(key=lambda x: x["similarity"], reverse=True)
+        return matches[:top_k] if matches else None
@@ -0,0 +1,106 @@
+"""Single-flight coalescing of identical in-flight work.
+
+While a call for some key is running, further calls with the same key
+wait for it and share its result (or exception) instead of computing it
+again. Nothing is kept once the call finishes; that is the result cache's
+job. ``SingleFlight`` is for threads, ``AsyncSingleFlight`` for asyncio.
+"""
+
+import asyncio
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from instrumentation import count
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with equal keys across threads."""
+
+    def __init__(self, name: str = 'default'):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` unless a call with ``key`` is already in
+        flight, in which case wait for that one. Callers that joined get a
+        deep copy of the result, so they can modify it independently.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            count(f"singleflight_{self.name}_shared")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        count(f"singleflight_{self.name}_leader")
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        else:
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+            # Joiners copy from a private snapshot the leader's caller can't mutate
+            if call.waiters and call.error is None:
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent awaits with equal keys on one event loop."""
+
+    def __init__(self, name: str = 'default'):
+        self.name = name
+        # key -> [task, number of callers that joined it]
+        self._flights: Dict[Hashable, list] = {}
+
+    async def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Await ``fn(*args, **kwargs)`` unless a call with ``key`` is already in
+        flight. The work runs as its own task, so one caller being cancelled
+        doesn't cancel it for the others; joiners get a deep copy of the result.
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            count(f"singleflight_{self.name}_shared")
+            flight[1] += 1
+            return copy.deepcopy(await asyncio.shield(flight[0]))
+
+        count(f"singleflight_{self.name}_leader")
+        task = asyncio.ensure_future(fn(*args, **kwargs))
+        flight = self._flights[key] = [task, 0]
+        task.add_done_callback(lambda _: self._flights.pop(key, None))
+        result = await asyncio.shield(task)
+        # With joiners, every caller gets its own copy of the shared result
+        return copy.deepcopy(result) if flight[1] else result
+
+    def in_flight(self) -> int:
+        return len(self._flights)
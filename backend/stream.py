@@ -0,0 +1,105 @@
+"""Streaming verification of large NDJSON/CSV explanation files.
+
+Usage:
+    python stream.py audit.ndjson > results.ndjson
+    cat audit.csv | python stream.py --format csv --column text -
+
+Each input record produces one NDJSON result line as soon as it is verified;
+input is read lazily, so memory use does not grow with file size.
+"""
+
+import argparse
+import csv
+import json
+import sys
+from typing import Dict, Iterable, Iterator, Union
+
+from verifier import SCORING_MODES, iter_verify_explanations
+
+
+def iter_records(lines: Iterable[Union[str, bytes]], fmt: str = 'ndjson',
+                 column: str = 'explanation') -> Iterator[Dict]:
+    """
+    Turn raw input lines into verification items.
+    NDJSON lines may be objects (with "explanation", optional "domain"/"id")
+    or bare JSON strings. Unparseable lines become items carrying an "error".
+    """
+    if fmt == 'csv':
+        # A CSV record may span lines, so bad bytes are replaced rather than failing one record
+        lines = (line.decode('utf-8', errors='replace') if isinstance(line, bytes) else line for line in lines)
+        for row in csv.DictReader(lines):
+            record = {"explanation": row.get(column) or ''}
+            if row.get('domain'):
+                record["domain"] = row['domain']
+            if row.get('id'):
+                record["id"] = row['id']
+            yield record
+        return
+
+    for line_number, line in enumerate(lines, 1):
+        try:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+        except UnicodeDecodeError as e:
+            yield {"error": f"Invalid UTF-8 on line {line_number}: {e}"}
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            yield {"error": f"Invalid JSON on line {line_number}: {e}"}
+            continue
+
+        if isinstance(value, str):
+            yield {"explanation": value}
+        elif isinstance(value, dict):
+            if column != 'explanation' and column in value:
+                value = dict(value, explanation=value[column])
+            yield value
+        else:
+            yield {"error": f"Line {line_number} is not an object or string"}
+
+
+def verify_stream(lines: Iterable[Union[str, bytes]], fmt: str = 'ndjson', domain: str = 'agriculture',
+                  column: str = 'explanation', max_workers: int = 1, **options) -> Iterator[str]:
+    """Yield one serialized NDJSON result line per input record; ``options`` go to verify_explanation"""
+    records = iter_records(lines, fmt, column)
+    for outcome in iter_verify_explanations(records, domain, max_workers=max_workers, **options):
+        yield json.dumps(outcome, ensure_ascii=False) + "\n"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Verify AI explanations from an NDJSON or CSV file, "
+                                                 "writing one NDJSON result per line.")
+    parser.add_argument('input', nargs='?', default='-', help="input file, or - for stdin (default)")
+    parser.add_argument('--format', choices=['ndjson', 'csv'],
+                        help="input format (default: from file extension, else ndjson)")
+    parser.add_argument('--column', default='explanation', help="field holding the explanation text")
+    parser.add_argument('--domain', default='agriculture', help="domain for records that don't set one")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes (default: 1)")
+    parser.add_argument('--scoring', choices=SCORING_MODES, help="confidence scoring mode (default: SCORING_MODE)")
+    parser.add_argument('--seed', help="seed for reproducible random scoring")
+    parser.add_argument('--output', '-o', default='-', help="output file, or - for stdout (default)")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('csv' if args.input.lower().endswith('.csv') else 'ndjson')
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8', newline='')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+
+    try:
+        options = {key: value for key, value in (('scoring', args.scoring), ('seed', args.seed)) if value is not None}
+        for line in verify_stream(source, fmt, args.domain, args.column, args.workers, **options):
+            sink.write(line)
+            sink.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,42 +1,199 @@
-import re
-from typing import Dict, List
+import os
 import random
+import hashlib
+import threading
+from functools import lru_cache
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-def verify_explanation(explanation: str, domain: str = 'agriculture') -> Dict:
+from aggregate import RunningAggregate, aggregate_claims
+from cache import ResultCache, cache_key
+from instrumentation import count, register_collector, stage
+from rules import RULES, RulePack
+from sentences import iter_claims, split_claims
+
+# Batches smaller than this are verified in-process; the pool isn't worth the IPC
+MIN_PARALLEL_BATCH = 16
+
+# Items sent to a worker per task when streaming
+STREAM_CHUNK_SIZE = 32
+
+# Bumped whenever result contents change, so persisted cache entries don't go stale
+RESULT_FORMAT = 4
+
+# Whole-explanation result cache; RESULT_CACHE_SIZE=0 disables it
+_cache_size = int(os.environ.get('RESULT_CACHE_SIZE', 10000))
+RESULT_CACHE = ResultCache(
+    max_size=_cache_size,
+    ttl=float(os.environ['RESULT_CACHE_TTL']) if os.environ.get('RESULT_CACHE_TTL') else None,
+    db_path=os.environ.get('RESULT_CACHE_DB')
+) if _cache_size > 0 else None
+
+# How claim confidence is scored: "random" draws within the rule's range,
+# "deterministic" derives it from the claim's matched features
+SCORING_MODES = ("random", "deterministic")
+SCORING_MODE = os.environ.get('SCORING_MODE', 'random')
+if SCORING_MODE not in SCORING_MODES:
+    raise ValueError(f"SCORING_MODE must be one of {SCORING_MODES}, not {SCORING_MODE!r}")
+
+# Per-claim memo: boilerplate sentences recur across explanations
+CLAIM_CACHE_SIZE = int(os.environ.get('CLAIM_CACHE_SIZE', 50000))
+
+# Shared worker pools, one per size: requests asking for different worker
+# counts (e.g. streaming vs batch) must not shut down each other's pool
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pool_lock = threading.Lock()
+
+def verify_explanation(explanation: str, domain: str = 'agriculture', use_cache: bool = True,
+                       scoring: Optional[str] = None, seed: Optional[Union[int, str]] = None) -> Dict:
     """
     Verify an AI explanation for logical consistency and completeness.
     Enhanced with detailed metrics for interactive visualizations.
+    Results are cached by exact text, so repeated explanations are
+    answered from RESULT_CACHE (and get the same result every time).
+    ``scoring`` overrides SCORING_MODE; a ``seed`` makes random scoring reproducible.
+    """
+    scoring = scoring or SCORING_MODE
+    if scoring not in SCORING_MODES:
+        raise ValueError(f"scoring must be one of {SCORING_MODES}")
+    
+    if not use_cache or RESULT_CACHE is None:
+        return _verify_explanation(explanation, domain, scoring, seed)
+    
+    key = cache_key(explanation, domain, scoring, seed, RESULT_FORMAT, RULES.get(domain).fingerprint)
+    result = RESULT_CACHE.get(key)
+    if result is None:
+        result = _verify_explanation(explanation, domain, scoring, seed)
+        RESULT_CACHE.set(key, result)
+    return result
+
+def verify_explanation_batch(pairs: List[Tuple[str, str]], use_cache: bool = True,
+                             scoring: Optional[str] = None, seed: Optional[Union[int, str]] = None) -> List[Dict]:
+    """
+    Verify (explanation, domain) pairs in-process, aggregating the metrics of
+    every uncached explanation in one batched pass (see aggregate.py).
+    Results are identical to calling verify_explanation on each pair.
+    """
+    scoring = scoring or SCORING_MODE
+    if scoring not in SCORING_MODES:
+        raise ValueError(f"scoring must be one of {SCORING_MODES}")
+    
+    caching = use_cache and RESULT_CACHE is not None
+    results = [None] * len(pairs)
+    keys = [None] * len(pairs)
+    misses = []
+    for i, (explanation, domain) in enumerate(pairs):
+        if caching:
+            keys[i] = cache_key(explanation, domain, scoring, seed, RESULT_FORMAT, RULES.get(domain).fingerprint)
+            results[i] = RESULT_CACHE.get(keys[i])
+        if results[i] is None:
+            misses.append(i)
+    
+    verified = [_verify_claims(pairs[i][0], pairs[i][1], scoring, seed) for i in misses]
+    with stage("aggregate"):
+        aggregates = aggregate_claims([claims for claims, _ in verified], [pairs[i][0] for i in misses])
+    for i, (claims, issues), aggregate in zip(misses, verified, aggregates):
+        with stage("report"):
+            results[i] = _build_result(pairs[i][0], pairs[i][1], claims, issues, aggregate)
+        if caching:
+            RESULT_CACHE.set(keys[i], results[i])
+    return results
+
+def reverify_explanation(explanation: str, domain: str, previous_claims: List[Dict],
+                         scoring: Optional[str] = None, seed: Optional[Union[int, str]] = None) -> Dict:
+    """
+    Verify an edited explanation, reusing ``previous_claims`` (the "claims" of
+    an earlier result with the same domain, rules and scoring): only claims
+    whose text isn't among them go through verify_claim. Metrics, summary and
+    chart data are rebuilt from the per-claim results. Bypasses the cache.
+    """
+    scoring = scoring or SCORING_MODE
+    if scoring not in SCORING_MODES:
+        raise ValueError(f"scoring must be one of {SCORING_MODES}")
+    known = {claim["claim"]: claim for claim in previous_claims}
+    return _verify_explanation(explanation, domain, scoring, seed, known)
+
+def _verify_explanation(explanation: str, domain: str, scoring: str, seed, known: Optional[Dict] = None) -> Dict:
+    """Run the full verification pipeline, bypassing the cache"""
+    verified_claims, issues = _verify_claims(explanation, domain, scoring, seed, known)
+    with stage("aggregate"):
+        aggregate = aggregate_claims([verified_claims], [explanation])[0]
+    with stage("report"):
+        return _build_result(explanation, domain, verified_claims, issues, aggregate)
+
+def _verify_claims(explanation: str, domain: str, scoring: str, seed,
+                   known: Optional[Dict] = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Parse an explanation into claims and verify each one, returning (claims, issues).
+    Claims found in ``known`` (claim text -> earlier verification) are not verified again.
     """
     
-    # Parse explanation into claims
-    claims = parse_claims(explanation)
+    # Parse explanation into claims, with their offsets in the text
+    with stage("parse_claims"):
+        claims = list(iter_claims(explanation))
     
     # Verify each claim with detailed scoring
     verified_claims = []
     issues = []
-    metrics = {
-        "data_quality": 0,
-        "logical_consistency": 0,
-        "completeness": 0,
-        "evidence_strength": 0,
-        "contextual_relevance": 0
-    }
-    
-    for claim in claims:
-        verification = verify_claim(claim, domain)
-        verified_claims.append(verification)
-        
-        if verification['status'] != 'valid':
-            issues.append(verification)
-    
-    # Calculate detailed metrics for charts
-    metrics = calculate_detailed_metrics(verified_claims, explanation)
+    verified = 0
+    
+    with stage("verify_claims"):
+        for claim in claims:
+            previous = known.get(claim.text) if known else None
+            if previous is None:
+                verification = verify_claim(claim.text, domain, scoring, seed)
+                verified += 1
+            else:
+                verification = dict(previous)
+            verification["start"] = claim.start
+            verification["end"] = claim.end
+            verified_claims.append(verification)
+            
+            if verification['status'] != 'valid':
+                issues.append(verification)
+    count("claims", verified)
+    
+    return verified_claims, issues
+
+def iter_verify_claims(explanation: str, domain: str = 'agriculture', scoring: Optional[str] = None,
+                       seed: Optional[Union[int, str]] = None) -> Iterator[Tuple[Dict, Dict]]:
+    """
+    Verify an explanation one claim at a time, yielding (claim, aggregate):
+    the verified claim with its offsets and the aggregate_claims() entry of
+    all claims so far. ``build_result`` turns the claims into a full result.
+    """
+    scoring = scoring or SCORING_MODE
+    if scoring not in SCORING_MODES:
+        raise ValueError(f"scoring must be one of {SCORING_MODES}")
+    
+    running = RunningAggregate(explanation)
+    for claim in iter_claims(explanation):
+        verification = verify_claim(claim.text, domain, scoring, seed)
+        verification["start"] = claim.start
+        verification["end"] = claim.end
+        count("claims")
+        running.add(verification)
+        yield verification, running.result()
+
+def build_result(explanation: str, domain: str, verified_claims: List[Dict], aggregate: Dict) -> Dict:
+    """The verify_explanation() result for already verified claims and their aggregate"""
+    issues = [claim for claim in verified_claims if claim['status'] != 'valid']
+    return _build_result(explanation, domain, verified_claims, issues, aggregate)
+
+def _build_result(explanation: str, domain: str, verified_claims: List[Dict], issues: List[Dict],
+                  aggregate: Dict) -> Dict:
+    """Assemble the response from verified claims and their aggregate_claims() entry"""
+    metrics = aggregate["metrics"]
+    statuses = aggregate["status_distribution"]
     
     # Generate summary with enhanced details
-    summary = generate_enhanced_summary(verified_claims, issues, metrics)
+    summary = _summary_text(len(verified_claims), statuses["valid"], statuses["invalid"],
+                            statuses["questionable"], metrics)
     
     # Add chart data for frontend visualization
-    chart_data = generate_chart_data(verified_claims, metrics)
+    chart_data = _chart_data(verified_claims, dict(statuses), dict(aggregate["confidence_distribution"]), metrics)
     
     return {
         "original_text": explanation,
@@ -44,22 +201,225 @@ def verify_explanation(explanation: str, domain: str = 'agriculture') -> Dict:
         "claims": verified_claims,
         "issues": issues,
         "summary": summary,
-        "overall_status": get_overall_status(verified_claims),
+        "overall_status": aggregate["overall_status"],
         "metrics": metrics,
         "chart_data": chart_data,
         "recommendations": generate_recommendations(issues, metrics)
     }
 
+def verify_explanations(explanations: List[Union[str, Dict]], domain: str = 'agriculture',
+                        max_workers: Optional[int] = None, **options) -> List[Dict]:
+    """
+    Verify many explanations, fanning them out across a process pool.
+    Items may be plain strings or dicts with "explanation" and optional "domain".
+    Results come back in input order; a failing item yields an error entry
+    instead of aborting the whole batch. ``options`` go to verify_explanation.
+    """
+    items = [(item, domain, options) for item in explanations]
+    workers = max_workers or os.cpu_count() or 1
+
+    if workers <= 1 or len(items) < MIN_PARALLEL_BATCH:
+        outcomes = _verify_chunk(items)
+    else:
+        chunksize = max(1, len(items) // (workers * 4))
+        chunks = [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+        pool = _get_pool(workers)
+        try:
+            outcomes = [outcome for chunk in pool.map(_verify_chunk, chunks) for outcome in chunk]
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); drop the pool and retry once
+            _discard_pool(workers, pool)
+            outcomes = [outcome for chunk in _get_pool(workers).map(_verify_chunk, chunks) for outcome in chunk]
+
+    return [dict(outcome, index=i) for i, outcome in enumerate(outcomes)]
+
+def iter_verify_explanations(explanations: Iterable[Union[str, Dict]], domain: str = 'agriculture',
+                             max_workers: Optional[int] = None, window: Optional[int] = None,
+                             **options) -> Iterator[Dict]:
+    """
+    Lazily verify a stream of explanations, yielding results in input order.
+    At most ``window`` chunks are in flight at once, so memory stays bounded
+    no matter how long the input is. ``options`` go to verify_explanation.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    items = ((item, domain, options) for item in explanations)
+
+    if workers <= 1:
+        for i, item in enumerate(items):
+            yield dict(_verify_item(item), index=i)
+        return
+
+    window = window or workers * 2
+    pool = _get_pool(workers)
+    pending = deque()
+    index = 0
+    chunk = []
+
+    def drain(limit):
+        nonlocal index
+        while len(pending) > limit:
+            for outcome in pending.popleft().result():
+                yield dict(outcome, index=index)
+                index += 1
+
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            pending.append(pool.submit(_verify_chunk, chunk))
+            chunk = []
+            yield from drain(window)
+    if chunk:
+        pending.append(pool.submit(_verify_chunk, chunk))
+    yield from drain(0)
+
+def _verify_chunk(items) -> List[Dict]:
+    """Verify a chunk of batch items (sharing options), aggregating their metrics together"""
+    if not items:
+        return []
+    options = items[0][2]
+    outcomes = []
+    pairs = []
+    for item in items:
+        outcome, explanation, domain = _prepare_item(item)
+        outcomes.append(outcome)
+        if explanation is not None:
+            pairs.append((explanation, domain))
+    
+    try:
+        results = iter(verify_explanation_batch(pairs, **options))
+    except Exception:
+        # Redo item by item so an error only fails the item that caused it
+        return [_verify_item(item) for item in items]
+    
+    for outcome in outcomes:
+        if "success" not in outcome:
+            outcome.update(success=True, result=next(results))
+    return outcomes
+
+def _verify_item(args) -> Dict:
+    """Verify one batch item, capturing errors so they stay per-item"""
+    outcome, explanation, domain = _prepare_item(args)
+    if explanation is None:
+        return outcome
+    try:
+        return dict(outcome, success=True, result=verify_explanation(explanation, domain, **args[2]))
+    except Exception as e:
+        return dict(outcome, success=False, error=str(e))
+
+def _prepare_item(args) -> Tuple[Dict, Optional[str], Optional[str]]:
+    """
+    Unpack a batch item into (outcome, explanation, domain). Invalid items
+    come back with a finished error outcome and no explanation.
+    """
+    item, default_domain, options = args
+    outcome = {}
+    if isinstance(item, dict):
+        if "id" in item:
+            outcome["id"] = item["id"]
+        if item.get("error"):
+            # Input that already failed upstream (e.g. an unparseable line)
+            return dict(outcome, success=False, error=item["error"]), None, None
+        explanation = item.get('explanation', '')
+        domain = item.get('domain') or default_domain
+    else:
+        explanation, domain = item, default_domain
+    
+    if not isinstance(explanation, str) or not explanation:
+        return dict(outcome, success=False, error="No explanation provided"), None, None
+    return outcome, explanation, domain
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the shared worker pool of the requested size, creating it on first use"""
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return pool
+
+def _discard_pool(workers: int, pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool, unless another caller already replaced it"""
+    with _pool_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
 def parse_claims(text: str) -> List[str]:
     """Parse text into individual claims"""
-    # Split by sentences
-    sentences = re.split(r'[.!?]+', text)
-    claims = [s.strip() for s in sentences if s.strip()]
-    return claims
+    # Split by sentences, keeping decimals and abbreviations intact
+    return split_claims(text)
+
+def verify_claim(claim: str, domain: str, scoring: Optional[str] = None,
+                 seed: Optional[Union[int, str]] = None) -> Dict:
+    """
+    Verify a single claim against the rule pack for ``domain``.
+    Identical claims are classified once per pack and then served from a bounded memo.
+    """
+    result = _verify_claim_memo(claim, RULES.get(domain), scoring or SCORING_MODE, seed)
+    return dict(result, triggers=list(result["triggers"]))
 
-def verify_claim(claim: str, domain: str) -> Dict:
-    """Verify a single claim using pattern matching and heuristics"""
-    claim_lower = claim.lower()
+def claim_cache_stats() -> Dict:
+    """Hit/miss counters for the per-claim memo"""
+    info = _verify_claim_memo.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+        "size": info.currsize,
+        "max_size": info.maxsize
+    }
+
+def clear_claim_cache() -> None:
+    _verify_claim_memo.cache_clear()
+
+def _cache_metrics() -> Dict:
+    """Result and claim cache counters for the /metrics endpoint"""
+    caches = {"claim": claim_cache_stats()}
+    if RESULT_CACHE is not None:
+        caches["result"] = RESULT_CACHE.stats()
+    return {
+        "explaincheck_cache_requests_total": ("Cache lookups by cache and outcome", "counter", [
+            ({"cache": name, "outcome": outcome}, stats[field])
+            for name, stats in caches.items() for outcome, field in (("hit", "hits"), ("miss", "misses"))
+        ]),
+        "explaincheck_cache_entries": ("Entries currently held per cache", "gauge", [
+            ({"cache": name}, stats["size"]) for name, stats in caches.items()
+        ])
+    }
+
+register_collector(_cache_metrics)
+
+@lru_cache(maxsize=CLAIM_CACHE_SIZE)
+def _verify_claim_memo(claim: str, rules: RulePack, scoring: str, seed) -> Dict:
+    # Callers only ever see copies of the memoized dict. Keyed by the pack
+    # object, so reloaded rules never hit entries computed with the old ones
+    return _verify_claim(claim, rules, scoring, seed)
+
+def _score_confidence(low: int, high: int, claim: str, specificity: int, scoring: str, seed) -> int:
+    """
+    Pick a confidence within [low, high]. A seed gives a reproducible draw that
+    depends only on the seed and the claim (not on claim order); deterministic
+    scoring places the claim in the range by its specificity.
+    """
+    if scoring == 'deterministic':
+        return low + round((high - low) * specificity / 100)
+    if seed is not None:
+        digest = hashlib.sha256(f"{seed}\x00{claim}".encode('utf-8')).digest()
+        return low + int.from_bytes(digest[:8], 'big') % (high - low + 1)
+    return random.randint(low, high)
+
+def _verify_claim(claim: str, rules: RulePack, scoring: str, seed) -> Dict:
+    """Classify a claim from scratch"""
+    # Classify the claim against the domain's compiled rules in one pass
+    return classify_claim(claim, rules.matcher.scan(claim), scoring, seed)
+
+def classify_claim(claim: str, hits: Dict[str, List[str]], scoring: Optional[str] = None,
+                   seed: Optional[Union[int, str]] = None) -> Dict:
+    """
+    Verify a claim from an already computed ``RuleMatcher.scan`` of it, for
+    callers that scan (or parse) the text themselves. Not memoized.
+    """
+    scoring = scoring or SCORING_MODE
     
     # Initialize verification result
     result = {
@@ -69,35 +429,17 @@ def verify_claim(claim: str, domain: str) -> Dict:
         "reasoning": "",
         "data_support": False,
         "logical_structure": "medium",
-        "specificity_score": 0
+        "specificity_score": 0,
+        "rule": None,
+        "triggers": []
     }
     
-    # Check for data/evidence indicators (good signs)
-    data_keywords = ["based on", "data shows", "research indicates", "studies show", 
-                    "measurements", "analysis", "forecast", "readings", "test", "monitoring"]
-    has_data = any(keyword in claim_lower for keyword in data_keywords)
-    
-    # Check for specificity (numbers, units, concrete details)
-    has_numbers = bool(re.search(r'\d+', claim))
-    has_units = bool(re.search(r'(mm|kg|lbs|acres?|hectares?|°[CF]|ppm|%)', claim))
-    
-    # Check for hedge words (uncertainty indicators)
-    hedge_words = ["may", "might", "could", "possibly", "perhaps", "generally", "typically"]
-    has_hedges = any(word in claim_lower for word in hedge_words)
-    
-    # Check for dangerous/invalid patterns
-    dangerous_patterns = [
-        "maximum concentration", "ignore", "regardless of", "always", "never", 
-        "every day", "daily application", "5x", "10x", "double", "triple"
-    ]
-    is_dangerous = any(pattern in claim_lower for pattern in dangerous_patterns)
-    
-    # Check for vague/incomplete patterns
-    vague_patterns = [
-        "may help", "will improve", "is good", "needs treatment", "should apply",
-        "consider", "results may vary", "generally recommended"
-    ]
-    is_vague = any(pattern in claim_lower for pattern in vague_patterns)
+    has_data = "data" in hits
+    has_numbers = "number" in hits
+    has_units = "unit" in hits
+    has_hedges = "hedge" in hits
+    is_dangerous = "dangerous" in hits
+    is_vague = "vague" in hits
     
     # Calculate specificity score (0-100)
     specificity = 0
@@ -110,26 +452,34 @@ def verify_claim(claim: str, domain: str) -> Dict:
     # Determine status
     if is_dangerous:
         result["status"] = "invalid"
-        result["confidence"] = random.randint(5, 20)
+        result["confidence"] = _score_confidence(5, 20, claim, specificity, scoring, seed)
         result["reasoning"] = "Contains potentially dangerous recommendations without safety considerations."
         result["logical_structure"] = "poor"
+        result["rule"] = "dangerous_pattern"
+        result["triggers"] = hits["dangerous"]
     elif has_data and has_numbers and has_units and not has_hedges:
         result["status"] = "valid"
-        result["confidence"] = random.randint(80, 95)
+        result["confidence"] = _score_confidence(80, 95, claim, specificity, scoring, seed)
         result["reasoning"] = "Well-supported claim with specific data and measurements."
         result["data_support"] = True
         result["logical_structure"] = "strong"
+        result["rule"] = "data_supported"
+        result["triggers"] = hits["data"] + hits["unit"]
     elif is_vague or (not has_data and not has_numbers):
         result["status"] = "questionable"
-        result["confidence"] = random.randint(30, 55)
+        result["confidence"] = _score_confidence(30, 55, claim, specificity, scoring, seed)
         result["reasoning"] = "Lacks specific data or contextual information to verify accuracy."
         result["logical_structure"] = "weak"
+        result["rule"] = "vague_pattern" if is_vague else "no_supporting_data"
+        result["triggers"] = hits.get("vague", [])
     else:
         result["status"] = "questionable"
-        result["confidence"] = random.randint(50, 70)
+        result["confidence"] = _score_confidence(50, 70, claim, specificity, scoring, seed)
         result["reasoning"] = "Partially supported but missing key details for full verification."
         result["data_support"] = has_data
         result["logical_structure"] = "medium"
+        result["rule"] = "partial_support"
+        result["triggers"] = hits.get("data", []) + hits.get("hedge", [])
     
     return result
 
@@ -196,6 +546,9 @@ def generate_chart_data(verified_claims: List[Dict], metrics: Dict) -> Dict:
         else:
             confidence_ranges["low"] += 1
     
+    return _chart_data(verified_claims, status_counts, confidence_ranges, metrics)
+
+def _chart_data(verified_claims: List[Dict], status_counts: Dict, confidence_ranges: Dict, metrics: Dict) -> Dict:
     # Metrics radar chart data
     radar_data = {
         "labels": ["Data Quality", "Logical Consistency", "Completeness", 
@@ -231,6 +584,9 @@ def generate_enhanced_summary(verified_claims: List[Dict], issues: List[Dict], m
     invalid = sum(1 for c in verified_claims if c["status"] == "invalid")
     questionable = sum(1 for c in verified_claims if c["status"] == "questionable")
     
+    return _summary_text(total, valid, invalid, questionable, metrics)
+
+def _summary_text(total: int, valid: int, invalid: int, questionable: int, metrics: Dict) -> str:
     avg_metrics = sum(metrics.values()) / len(metrics)
     
     if avg_metrics >= 75:
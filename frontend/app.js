@@ -7,6 +7,16 @@ const API_BASE_URL = window.location.hostname === 'localhost'
 // Chart instances (global to allow updates)
 let statusChart, confidenceChart, radarChart;
 
+// Last verified text and its server handle, so edits are re-verified incrementally
+let lastVerified = null;
+
+// Live verification while typing: wait this long after the last keystroke
+const LIVE_DEBOUNCE_MS = 600;
+const RADAR_LABELS = ["Data Quality", "Logical Consistency", "Completeness",
+                      "Evidence Strength", "Contextual Relevance"];
+let liveTimer = null;
+let liveController = null;
+
 document.addEventListener('DOMContentLoaded', () => {
     const verifyBtn = document.getElementById('verify-btn');
     const clearBtn = document.getElementById('clear-btn');
@@ -26,6 +36,12 @@ document.addEventListener('DOMContentLoaded', () => {
             verifyExplanation();
         }
     });
+    
+    // Verify progressively as the user types
+    explanationInput.addEventListener('input', () => {
+        clearTimeout(liveTimer);
+        liveTimer = setTimeout(startLiveVerification, LIVE_DEBOUNCE_MS);
+    });
 });
 
 async function loadRandomDemo() {
@@ -71,19 +87,20 @@ async function verifyExplanation() {
         return;
     }
     
+    // A full verification supersedes any live one
+    clearTimeout(liveTimer);
+    if (liveController) liveController.abort();
+    
     // Show loading
     loading.style.display = 'flex';
     verifyBtn.disabled = true;
     resultsSection.style.display = 'none';
     
     try {
-        const response = await fetch(`${API_BASE_URL}/verify`, {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({ explanation, domain })
-        });
-        
-        const data = await response.json();
+        const data = await requestVerification(explanation, domain);
+        if (data.handle) {
+            lastVerified = { text: explanation, domain, handle: data.handle };
+        }
         displayResults(data);
         
     } catch (error) {
@@ -95,6 +112,160 @@ async function verifyExplanation() {
     }
 }
 
+async function requestVerification(explanation, domain) {
+    // Send only what changed since the last verification of this domain
+    if (lastVerified && lastVerified.domain === domain) {
+        const response = await fetch(`${API_BASE_URL}/verify/incremental`, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({
+                handle: lastVerified.handle,
+                edits: [textEdit(lastVerified.text, explanation)]
+            })
+        });
+        if (response.status !== 404) {
+            return response.json();
+        }
+        // Handle expired on the server: verify the full text again
+    }
+    
+    const response = await fetch(`${API_BASE_URL}/verify/incremental`, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({ explanation, domain })
+    });
+    return response.json();
+}
+
+function textEdit(previous, current) {
+    // One edit spanning everything between the common prefix and suffix.
+    // Offsets count code points, as the server's string offsets do.
+    const before = Array.from(previous);
+    const after = Array.from(current);
+    const shorter = Math.min(before.length, after.length);
+    
+    let prefix = 0;
+    while (prefix < shorter && before[prefix] === after[prefix]) {
+        prefix++;
+    }
+    let suffix = 0;
+    while (suffix < shorter - prefix && before[before.length - 1 - suffix] === after[after.length - 1 - suffix]) {
+        suffix++;
+    }
+    
+    return {
+        start: prefix,
+        end: before.length - suffix,
+        text: after.slice(prefix, after.length - suffix).join('')
+    };
+}
+
+async function startLiveVerification() {
+    const explanation = document.getElementById('explanation-input').value.trim();
+    const domain = document.getElementById('domain-select').value;
+    
+    // Only the latest text matters; drop any stream still running
+    if (liveController) liveController.abort();
+    if (!explanation) return;
+    const controller = new AbortController();
+    liveController = controller;
+    
+    let state = null;
+    let pending = false;
+    const claimsList = document.getElementById('claims-list');
+    
+    // Redraw at most once per frame, however fast claims arrive
+    const scheduleRender = () => {
+        if (pending) return;
+        pending = true;
+        requestAnimationFrame(() => {
+            pending = false;
+            if (controller.signal.aborted) return;
+            displayMetrics(state.metrics);
+            renderCharts(liveChartData(state));
+        });
+    };
+    
+    const handlers = {
+        start: (data) => {
+            state = data;
+            document.getElementById('results-section').style.display = 'block';
+            claimsList.innerHTML = '';
+            scheduleRender();
+        },
+        claim: (data) => {
+            for (const [key, value] of Object.entries(data.delta)) {
+                state[key] = typeof value === 'object' ? { ...state[key], ...value } : value;
+            }
+            claimsList.appendChild(createClaimCard(data.claim));
+            if (Object.keys(data.delta).length > 0) scheduleRender();
+        },
+        done: (data) => {
+            displaySimilarityMatch(data.similarity_match);
+            displayOverallStatus(data.overall_status, data.summary);
+            displayMetrics(data.metrics);
+            renderCharts(data.chart_data);
+            displayRecommendations(data.recommendations);
+            if (data.claim_count === 0) claimsList.innerHTML = '<p>No claims analyzed.</p>';
+        },
+        error: (data) => console.error('Live verification failed:', data.error)
+    };
+    
+    try {
+        const response = await fetch(`${API_BASE_URL}/verify/live`, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({ explanation, domain }),
+            signal: controller.signal
+        });
+        if (!response.ok) return;
+        await readEvents(response, (event, data) => {
+            if (handlers[event]) handlers[event](data);
+        });
+    } catch (error) {
+        if (error.name !== 'AbortError') console.error('Live verification failed:', error);
+    }
+}
+
+async function readEvents(response, onEvent) {
+    // Minimal Server-Sent Events parser over a fetch body (EventSource can't POST)
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            for (const line of message.split('\n')) {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
+function liveChartData(state) {
+    const metrics = state.metrics;
+    return {
+        status_distribution: state.status_distribution,
+        confidence_distribution: state.confidence_distribution,
+        metrics_radar: {
+            labels: RADAR_LABELS,
+            values: [metrics.data_quality, metrics.logical_consistency, metrics.completeness,
+                     metrics.evidence_strength, metrics.contextual_relevance]
+        }
+    };
+}
+
 function displayResults(data) {
     const resultsSection = document.getElementById('results-section');
     
@@ -170,10 +341,28 @@ function displayMetrics(metrics) {
 function renderCharts(chartData) {
     if (!chartData) return;
     
-    // Destroy existing charts
-    if (statusChart) statusChart.destroy();
-    if (confidenceChart) confidenceChart.destroy();
-    if (radarChart) radarChart.destroy();
+    const statusValues = [
+        chartData.status_distribution.valid,
+        chartData.status_distribution.invalid,
+        chartData.status_distribution.questionable
+    ];
+    const confidenceValues = [
+        chartData.confidence_distribution.high,
+        chartData.confidence_distribution.medium,
+        chartData.confidence_distribution.low
+    ];
+    
+    // Update existing charts in place rather than rebuilding them
+    if (statusChart && confidenceChart && radarChart) {
+        statusChart.data.datasets[0].data = statusValues;
+        confidenceChart.data.datasets[0].data = confidenceValues;
+        radarChart.data.labels = chartData.metrics_radar.labels;
+        radarChart.data.datasets[0].data = chartData.metrics_radar.values;
+        statusChart.update();
+        confidenceChart.update();
+        radarChart.update();
+        return;
+    }
     
     // Status Distribution Pie Chart
     const statusCtx = document.getElementById('statusChart').getContext('2d');
@@ -182,11 +371,7 @@ function renderCharts(chartData) {
         data: {
             labels: ['Valid', 'Invalid', 'Questionable'],
             datasets: [{
-                data: [
-                    chartData.status_distribution.valid,
-                    chartData.status_distribution.invalid,
-                    chartData.status_distribution.questionable
-                ],
+                data: statusValues,
                 backgroundColor: ['#4caf50', '#f44336', '#ff9800']
             }]
         },
@@ -206,11 +391,7 @@ function renderCharts(chartData) {
             labels: ['High (75%+)', 'Medium (45-75%)', 'Low (<45%)'],
             datasets: [{
                 label: 'Number of Claims',
-                data: [
-                    chartData.confidence_distribution.high,
-                    chartData.confidence_distribution.medium,
-                    chartData.confidence_distribution.low
-                ],
+                data: confidenceValues,
                 backgroundColor: ['#4caf50', '#ff9800', '#f44336']
             }]
         },
@@ -273,28 +454,33 @@ function displayClaims(claims) {
     
     if (claims && claims.length > 0) {
         claims.forEach(claim => {
-            const claimCard = document.createElement('div');
-            claimCard.className = 'claim-card';
-            
-            const statusClass = `status-${claim.status}`;
-            
-            claimCard.innerHTML = `
-                <div class="claim-header">
-                    <span class="claim-status ${statusClass}">${claim.status}</span>
-                    <span class="claim-confidence">${claim.confidence}% confidence</span>
-                </div>
-                <p class="claim-text">${claim.claim}</p>
-                <p class="claim-reasoning"><strong>Reasoning:</strong> ${claim.reasoning}</p>
-            `;
-            
-            claimsList.appendChild(claimCard);
+            claimsList.appendChild(createClaimCard(claim));
         });
     } else {
         claimsList.innerHTML = '<p>No claims analyzed.</p>';
     }
 }
 
+function createClaimCard(claim) {
+    const claimCard = document.createElement('div');
+    claimCard.className = 'claim-card';
+    
+    const statusClass = `status-${claim.status}`;
+    
+    claimCard.innerHTML = `
+        <div class="claim-header">
+            <span class="claim-status ${statusClass}">${claim.status}</span>
+            <span class="claim-confidence">${claim.confidence}% confidence</span>
+        </div>
+        <p class="claim-text">${claim.claim}</p>
+        <p class="claim-reasoning"><strong>Reasoning:</strong> ${claim.reasoning}</p>
+    `;
+    return claimCard;
+}
+
 function clearForm() {
+    clearTimeout(liveTimer);
+    if (liveController) liveController.abort();
     document.getElementById('explanation-input').value = '';
     document.getElementById('results-section').style.display = 'none';
 }
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from scenarios import ScenarioCorpus, validate_scenario
+
+
+def scenario(scenario_id, title='Irrigation'):
+    return validate_scenario({"id": scenario_id, "title": title, "category": "irrigation",
+                              "explanation": f"Water the field early ({title}).", "expected_status": "valid"})
+
+
+def test_overlay_updates_match_a_plain_list():
+    rng = random.Random(3)
+    corpus = ScenarioCorpus([scenario(i) for i in range(200)])
+    expected = list(corpus)
+    for _ in range(300):
+        if rng.random() < 0.6:
+            added = scenario(rng.choice([rng.randrange(300), f"c{rng.randrange(30)}"]), f"T{rng.randrange(99)}")
+            corpus.add([added])
+            positions = [i for i, item in enumerate(expected) if item["id"] == added["id"]]
+            if positions:
+                expected[positions[0]] = added
+            else:
+                expected.append(added)
+        elif expected:
+            doomed = rng.choice(expected)["id"]
+            corpus.remove([doomed])
+            expected = [item for item in expected if item["id"] != doomed]
+
+        assert len(corpus) == len(expected)
+        start = rng.randrange(len(expected) + 1)
+        assert corpus[start:start + 10] == expected[start:start + 10]
+    assert list(corpus) == expected
+    assert all(corpus.get(item["id"]) == item for item in expected)
+
+
+def test_from_file_rejects_duplicate_ids(tmp_path):
+    path = tmp_path / "scenarios.jsonl"
+    path.write_text('{"id": 1, "title": "A", "category": "c", "explanation": "E.", "expected_status": "valid"}\n' * 2)
+    with pytest.raises(ValueError, match="duplicate ids"):
+        ScenarioCorpus.from_file(str(path))
@@ -0,0 +1,28 @@
+from sentences import iter_claims, split_claims
+
+
+def _check_offsets(text):
+    for claim in iter_claims(text):
+        assert text[claim.start:claim.end] == claim.text
+
+
+def test_numbered_list_markers_are_not_claims():
+    text = "Intro:\n1. Water the corn.\n2) Spray at 2.5 l/ha.\n  10. Scout again"
+    assert split_claims(text) == ["Intro:", "Water the corn", "Spray at 2.5 l/ha", "Scout again"]
+    _check_offsets(text)
+
+
+def test_list_marker_at_text_start():
+    assert split_claims("1. Water the corn. Then wait.") == ["Water the corn", "Then wait"]
+
+
+def test_marker_only_at_line_start():
+    text = "Plant in row 3. Then water it."
+    assert split_claims(text) == ["Plant in row 3", "Then water it"]
+    _check_offsets(text)
+
+
+def test_decimals_and_abbreviations_do_not_split():
+    text = "Apply approx. 2.5 kg/ha, e.g. at dawn. Done!"
+    assert split_claims(text) == ["Apply approx. 2.5 kg/ha, e.g. at dawn", "Done"]
+    _check_offsets(text)
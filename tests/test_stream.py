@@ -0,0 +1,19 @@
+import json
+
+from stream import iter_records, verify_stream
+
+
+def test_invalid_utf8_line_fails_only_its_record():
+    lines = [b'{"explanation": "Water the corn at 20mm."}\n',
+             b'{"explanation": "bad \xff\xfe bytes"}\n',
+             b'{"explanation": "Soil pH is 6.5."}\n']
+
+    records = list(iter_records(lines))
+    assert records[0] == {"explanation": "Water the corn at 20mm."}
+    assert records[1]["error"].startswith("Invalid UTF-8 on line 2")
+    assert records[2] == {"explanation": "Soil pH is 6.5."}
+
+    outcomes = [json.loads(line) for line in verify_stream(lines, use_cache=False)]
+    assert [outcome["index"] for outcome in outcomes] == [0, 1, 2]
+    assert [outcome["success"] for outcome in outcomes] == [True, False, True]
+    assert "Invalid UTF-8" in outcomes[1]["error"]